@@ -3,17 +3,146 @@ CalPal CLI - Command-line interface for the meeting scheduler
 """
 
 import click
+import csv
+import json
 import os
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
-from .core import ParserAgent, CalendarAgent, SchedulerAgent
+from .core import (
+    ParserAgent, CalendarAgent, SchedulerAgent, SchedulerPool, PlannerAgent, SchedulePlan,
+    AttendeeDirectory, RoomAgent, Recorder, Replayer, CalendarAnalyzer
+)
+from .core import ScheduleResult, ScheduleOutcome
+from .utils.helpers import format_datetime
+
+
+def _echo_progress(name, data):
+    """Print agent progress events for interactive commands"""
+    if name == 'request.received':
+        click.echo(f"Processing request: '{data['request']}'")
+        click.echo("Parsing meeting details...")
+    elif name == 'parse.fallback':
+        click.echo(f"LLM parsing failed: {data['error']}")
+    elif name == 'parse.completed':
+        meeting = data['meeting']
+        click.echo(f"Parsed meeting: {meeting.topic}")
+        click.echo(f"   Attendees: {', '.join(meeting.attendees)}")
+        click.echo(f"   Duration: {meeting.duration_minutes} minutes")
+        click.echo(f"   Time constraint: {meeting.time_constraint}")
+        click.echo("Finding available time slots...")
+    elif name == 'attendees.unresolved':
+        click.echo(f"   Could not resolve attendees: {', '.join(data['names'])}")
+    elif name == 'rooms.unreadable':
+        click.echo(f"   Skipping rooms whose calendars cannot be read: {', '.join(data['rooms'])}")
+    elif name == 'search.completed' and data['slots']:
+        _echo_slots(data['slots'])
+    elif name == 'slot.proposed':
+        click.echo("\nProposed meeting time:")
+        click.echo(format_datetime(data['slot'].start_time))
+        click.echo(f"  Duration: {data['slot'].duration_minutes} minutes")
+        if data['slot'].room:
+            click.echo(f"  Room: {data['slot'].room.name}")
+        click.echo("Creating calendar event...")
+    elif name == 'booking.conflict':
+        click.echo(f"Slot {format_datetime(data['slot'].start_time)} was taken, trying next")
+    elif name == 'event.created':
+        click.echo(f"Event created: {data['link']}")
+
+
+def _echo_slots(slots):
+    """Print a numbered list of time slots"""
+    click.echo(f"Found {len(slots)} available slots:")
+    for i, slot in enumerate(slots, 1):
+        room = f" in {slot.room.name}" if slot.room else ""
+        click.echo(f"   {i}. {format_datetime(slot.start_time)}{room}")
+
+
+def _echo_result(result: ScheduleResult):
+    """Print the outcome of a scheduling request"""
+    if result.success:
+        click.echo("Meeting scheduled successfully!")
+        click.echo(f"    {format_datetime(result.slot.start_time)}")
+        if result.slot.room:
+            click.echo(f"   Room: {result.slot.room.name}")
+        click.echo(f"   👥 Attendees: {', '.join(result.meeting.attendees)}")
+        return
+    
+    if result.outcome == ScheduleOutcome.NO_SLOTS:
+        click.echo("No available time slots found")
+    elif result.outcome == ScheduleOutcome.CANCELLED:
+        click.echo("Meeting scheduling cancelled")
+    for error in result.errors:
+        click.echo(f"Failed at {error.stage}: {error.message}")
+
+
+def _session():
+    """The record/replay session chosen with --record or --replay, if any"""
+    return click.get_current_context().find_root().obj
+
+
+def _replaying():
+    session = _session()
+    return session is not None and session.offline
+
+
+def _parser_agent(google_ai_key, directory=None):
+    """Create the parser agent, which needs no real API key when replaying
+    
+    With a directory, attendee names in LLM responses are repaired to emails.
+    """
+    models = click.get_current_context().find_root().meta.get('models')
+    return ParserAgent(google_ai_key or 'replay', session=_session(), models=models,
+                       directory=directory)
+
+
+def _calendar_agent(credentials_file, token_file, calendar_id):
+    """Create the calendar agent with the global search and record/replay options"""
+    step_minutes = click.get_current_context().find_root().meta.get('step_minutes', 30)
+    return CalendarAgent(credentials_file, token_file, calendar_id, session=_session(),
+                         step_minutes=step_minutes)
+
+
+def _echo_tier_stats(parser_agent):
+    """Print per-model statistics when more than one model tier is configured"""
+    if len(parser_agent.tiers) < 2:
+        return
+    for stats in parser_agent.tier_stats():
+        accuracy = f"{stats['accuracy']:.0%}" if stats['accuracy'] is not None else "n/a"
+        p95 = f"{stats['p95_ms']:.0f}ms" if stats['p95_ms'] is not None else "n/a"
+        click.echo(f"   {stats['model']}: {stats['calls']} calls, {accuracy} valid, "
+                   f"p95 {p95}, {stats['hedged']} hedged ({stats['hedge_wins']} won)")
 
 
 @click.group()
 @click.version_option(version="0.1.0")
-def cli():
+@click.option('--record', type=click.Path(dir_okay=False),
+              help='Record LLM and Calendar API traffic with timings to this file (.gz to compress)')
+@click.option('--replay', type=click.Path(exists=True, dir_okay=False),
+              help='Serve LLM and Calendar API traffic from a recording instead of live services')
+@click.option('--replay-latency', type=float, default=0.0, show_default=True,
+              help='Scale for replayed latency; 1.0 reproduces the recorded timings')
+@click.option('--models', envvar='CALPAL_MODELS',
+              help='Comma-separated LLM models to try in order, fastest first')
+@click.option('--step', envvar='CALPAL_STEP_MINUTES', type=click.Choice(['5', '15', '30']),
+              default='30', show_default=True,
+              help='Minutes between candidate start times, aligned to working hours')
+@click.pass_context
+def cli(ctx, record, replay, replay_latency, models, step):
     """CalPal - The Smart Meeting Scheduler Agent"""
-    pass
+    if record and replay:
+        raise click.UsageError("--record and --replay cannot be used together")
+    
+    ctx.meta['step_minutes'] = int(step)
+    if models:
+        ctx.meta['models'] = [model.strip() for model in models.split(',') if model.strip()]
+    
+    ctx.obj = None
+    if record:
+        ctx.obj = Recorder(record)
+        ctx.call_on_close(ctx.obj.close)
+    elif replay:
+        ctx.obj = Replayer(replay, latency_scale=replay_latency)
 
 
 @cli.command()
@@ -25,19 +154,26 @@ def cli():
               default='token.json', help='Google Calendar token file')
 @click.option('--calendar-id', envvar='DEFAULT_CALENDAR_ID', 
               default='primary', help='Google Calendar ID')
-def schedule(meeting_request, google_ai_key, credentials_file, token_file, calendar_id):
+@click.option('--contacts', envvar='CALPAL_CONTACTS', type=click.Path(exists=True, dir_okay=False),
+              help='Contacts file (CSV, JSON or SQLite) for resolving attendee names')
+@click.option('--rooms', envvar='CALPAL_ROOMS', type=click.Path(exists=True, dir_okay=False),
+              help='Rooms JSON file; books a free room along with each meeting')
+@click.option('--stream', is_flag=True,
+              help='Stream the LLM response and prefetch availability while it arrives')
+def schedule(meeting_request, google_ai_key, credentials_file, token_file, calendar_id, contacts,
+             rooms, stream):
     """Schedule a meeting using natural language"""
     
     # Load environment variables
     load_dotenv()
     
     # Validate required parameters
-    if not google_ai_key:
+    if not google_ai_key and not _replaying():
         click.echo("Error: GOOGLE_GENERATIVE_AI_API_KEY is required")
         click.echo("   Set it as an environment variable or use --google-ai-key")
         return
     
-    if not os.path.exists(credentials_file):
+    if not _replaying() and not os.path.exists(credentials_file):
         click.echo(f"Error: Google credentials file not found: {credentials_file}")
         click.echo("   Please download your credentials.json from Google Cloud Console")
         return
@@ -45,16 +181,19 @@ def schedule(meeting_request, google_ai_key, credentials_file, token_file, calen
     try:
         # Initialize agents
         click.echo("Initializing CalPal agents...")
-        parser_agent = ParserAgent(google_ai_key)
-        calendar_agent = CalendarAgent(credentials_file, token_file, calendar_id)
-        scheduler_agent = SchedulerAgent(parser_agent, calendar_agent)
+        directory = AttendeeDirectory.from_file(contacts) if contacts else None
+        parser_agent = _parser_agent(google_ai_key, directory)
+        calendar_agent = _calendar_agent(credentials_file, token_file, calendar_id)
+        room_agent = RoomAgent.from_file(calendar_agent, rooms, _echo_progress) if rooms else None
+        scheduler_agent = SchedulerAgent(parser_agent, calendar_agent, on_event=_echo_progress,
+                                         directory=directory, room_agent=room_agent,
+                                         stream_parse=stream)
         
         # Schedule the meeting
-        success = scheduler_agent.schedule_meeting(meeting_request)
+        result = scheduler_agent.schedule_meeting(meeting_request)
+        _echo_result(result)
         
-        if success:
-            click.echo("Meeting scheduled successfully!")
-        else:
+        if not result.success:
             click.echo("Failed to schedule meeting")
             exit(1)
             
@@ -80,33 +219,280 @@ def check(duration, time_constraint, google_ai_key, credentials_file, token_file
     load_dotenv()
     
     # Validate required parameters
-    if not google_ai_key:
+    if not google_ai_key and not _replaying():
         click.echo("Error: GOOGLE_GENERATIVE_AI_API_KEY is required")
         return
     
-    if not os.path.exists(credentials_file):
+    if not _replaying() and not os.path.exists(credentials_file):
         click.echo(f"Error: Google credentials file not found: {credentials_file}")
         return
     
     try:
         # Initialize agents
         click.echo("Initializing CalPal agents...")
-        parser_agent = ParserAgent(google_ai_key)
-        calendar_agent = CalendarAgent(credentials_file, token_file, calendar_id)
+        parser_agent = _parser_agent(google_ai_key)
+        calendar_agent = _calendar_agent(credentials_file, token_file, calendar_id)
         scheduler_agent = SchedulerAgent(parser_agent, calendar_agent)
         
         # Check available slots
+        click.echo(f"🔍 Finding available slots for {duration} minutes...")
         slots = scheduler_agent.list_available_slots(duration, time_constraint)
         
         if not slots:
             click.echo("No available time slots found")
             exit(1)
+        
+        _echo_slots(slots)
             
     except Exception as e:
         click.echo(f"Error: {e}")
         exit(1)
 
 
+@cli.command()
+@click.argument('requests_file', type=click.File('r'))
+@click.option('--workers', default=4, show_default=True, help='Number of scheduling workers')
+@click.option('--queue-size', default=32, show_default=True, help='Maximum number of queued requests')
+@click.option('--llm-concurrency', default=2, show_default=True, help='Maximum concurrent LLM calls')
+@click.option('--calendar-concurrency', default=4, show_default=True, help='Maximum concurrent calendar calls')
+@click.option('--google-ai-key', envvar='GOOGLE_GENERATIVE_AI_API_KEY', help='Google Generative AI API key')
+@click.option('--credentials-file', envvar='GOOGLE_CREDENTIALS_FILE', 
+              default='credentials.json', help='Google Calendar credentials file')
+@click.option('--token-file', envvar='GOOGLE_TOKEN_FILE', 
+              default='token.json', help='Google Calendar token file')
+@click.option('--calendar-id', envvar='DEFAULT_CALENDAR_ID', 
+              default='primary', help='Google Calendar ID')
+@click.option('--contacts', envvar='CALPAL_CONTACTS', type=click.Path(exists=True, dir_okay=False),
+              help='Contacts file (CSV, JSON or SQLite) for resolving attendee names')
+@click.option('--rooms', envvar='CALPAL_ROOMS', type=click.Path(exists=True, dir_okay=False),
+              help='Rooms JSON file; books a free room along with each meeting')
+@click.option('--stream', is_flag=True,
+              help='Stream the LLM response and prefetch availability while it arrives')
+def batch(requests_file, workers, queue_size, llm_concurrency, calendar_concurrency,
+          google_ai_key, credentials_file, token_file, calendar_id, contacts, rooms, stream):
+    """Schedule many meetings in parallel, one request per line ('-' for stdin)"""
+    
+    # Load environment variables
+    load_dotenv()
+    
+    # Validate required parameters
+    if not google_ai_key and not _replaying():
+        click.echo("Error: GOOGLE_GENERATIVE_AI_API_KEY is required")
+        return
+    
+    if not _replaying() and not os.path.exists(credentials_file):
+        click.echo(f"Error: Google credentials file not found: {credentials_file}")
+        return
+    
+    try:
+        # Initialize agents once and share them across workers
+        click.echo("Initializing CalPal agents...")
+        directory = AttendeeDirectory.from_file(contacts) if contacts else None
+        parser_agent = _parser_agent(google_ai_key, directory)
+        calendar_agent = _calendar_agent(credentials_file, token_file, calendar_id)
+        
+        room_list = RoomAgent.from_file(calendar_agent, rooms).rooms if rooms else None
+        
+        with SchedulerPool(parser_agent, calendar_agent, workers=workers, queue_size=queue_size,
+                           llm_concurrency=llm_concurrency,
+                           calendar_concurrency=calendar_concurrency,
+                           directory=directory, rooms=room_list,
+                           stream_parse=stream) as pool:
+            requests = [line.strip() for line in requests_file if line.strip()]
+            futures = [(request, pool.submit(request)) for request in requests]
+            failed = 0
+            for request, future in futures:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    click.echo(f"Error scheduling '{request}': {e}")
+                    failed += 1
+                    continue
+                
+                if result.success:
+                    room = f" in {result.slot.room.name}" if result.slot.room else ""
+                    click.echo(f"Scheduled '{request}' at {format_datetime(result.slot.start_time)}{room}")
+                else:
+                    failed += 1
+                    reason = result.errors[-1].message if result.errors else result.outcome.value
+                    click.echo(f"Failed to schedule '{request}': {reason}")
+        
+        click.echo(f"Scheduled {len(futures) - failed}/{len(futures)} meetings")
+        parser_agent.close()
+        _echo_tier_stats(parser_agent)
+        repairs = parser_agent.repairer.metrics()
+        if repairs['repaired']:
+            click.echo(f"Repaired {repairs['repaired']}/{repairs['responses']} LLM responses locally")
+        if failed:
+            exit(1)
+            
+    except Exception as e:
+        click.echo(f"Error: {e}")
+        exit(1)
+
+
+@cli.command()
+@click.argument('meeting_requests', nargs=-1, type=str)
+@click.option('--requests-file', type=click.File('r'), help='File with one request per line')
+@click.option('--output', '-o', type=click.File('w'), default='-', help='Where to write the plan JSON')
+@click.option('--google-ai-key', envvar='GOOGLE_GENERATIVE_AI_API_KEY', help='Google Generative AI API key')
+@click.option('--credentials-file', envvar='GOOGLE_CREDENTIALS_FILE', 
+              default='credentials.json', help='Google Calendar credentials file')
+@click.option('--token-file', envvar='GOOGLE_TOKEN_FILE', 
+              default='token.json', help='Google Calendar token file')
+@click.option('--calendar-id', envvar='DEFAULT_CALENDAR_ID', 
+              default='primary', help='Google Calendar ID')
+@click.option('--contacts', envvar='CALPAL_CONTACTS', type=click.Path(exists=True, dir_okay=False),
+              help='Contacts file (CSV, JSON or SQLite) for resolving attendee names')
+def plan(meeting_requests, requests_file, output, google_ai_key, credentials_file, token_file,
+         calendar_id, contacts):
+    """Plan meetings without creating them and write the plan as JSON"""
+    
+    # Load environment variables
+    load_dotenv()
+    
+    # Validate required parameters
+    if not google_ai_key and not _replaying():
+        click.echo("Error: GOOGLE_GENERATIVE_AI_API_KEY is required", err=True)
+        return
+    
+    if not _replaying() and not os.path.exists(credentials_file):
+        click.echo(f"Error: Google credentials file not found: {credentials_file}", err=True)
+        return
+    
+    requests = list(meeting_requests)
+    if requests_file:
+        requests.extend(line.strip() for line in requests_file if line.strip())
+    
+    if not requests:
+        click.echo("Error: no meeting requests given", err=True)
+        return
+    
+    try:
+        # Initialize agents
+        click.echo("Initializing CalPal agents...", err=True)
+        directory = AttendeeDirectory.from_file(contacts) if contacts else None
+        parser_agent = _parser_agent(google_ai_key, directory)
+        calendar_agent = _calendar_agent(credentials_file, token_file, calendar_id)
+        planner_agent = PlannerAgent(parser_agent, calendar_agent, directory=directory)
+        
+        schedule_plan = planner_agent.plan(requests)
+        output.write(schedule_plan.model_dump_json(indent=2) + "\n")
+        
+        planned = sum(1 for meeting in schedule_plan.meetings if meeting.slot)
+        click.echo(f"Planned {planned}/{len(schedule_plan.meetings)} meetings", err=True)
+            
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        exit(1)
+
+
+@cli.command()
+@click.argument('plan_file', type=click.File('r'))
+@click.option('--credentials-file', envvar='GOOGLE_CREDENTIALS_FILE', 
+              default='credentials.json', help='Google Calendar credentials file')
+@click.option('--token-file', envvar='GOOGLE_TOKEN_FILE', 
+              default='token.json', help='Google Calendar token file')
+def apply(plan_file, credentials_file, token_file):
+    """Create the meetings from a plan written by 'calpal plan'"""
+    
+    # Load environment variables
+    load_dotenv()
+    
+    if not _replaying() and not os.path.exists(credentials_file):
+        click.echo(f"Error: Google credentials file not found: {credentials_file}")
+        return
+    
+    try:
+        schedule_plan = SchedulePlan.model_validate_json(plan_file.read())
+        
+        # Applying needs no parsing, so no LLM is set up
+        calendar_agent = _calendar_agent(credentials_file, token_file, schedule_plan.calendar_id)
+        planner_agent = PlannerAgent(None, calendar_agent)
+        
+        results = planner_agent.apply(schedule_plan)
+        for result in results:
+            if result.success:
+                click.echo(f"Created '{result.request}' at {format_datetime(result.slot.start_time)}")
+            else:
+                for error in result.errors:
+                    click.echo(f"Failed '{result.request}' at {error.stage}: {error.message}")
+        
+        created = sum(result.success for result in results)
+        click.echo(f"Created {created}/{len(results)} meetings")
+        if created < sum(1 for meeting in schedule_plan.meetings if meeting.slot):
+            exit(1)
+            
+    except Exception as e:
+        click.echo(f"Error: {e}")
+        exit(1)
+
+
+@cli.command()
+@click.argument('calendar_ids', nargs=-1, type=str)
+@click.option('--calendars-file', type=click.File('r'), help='File with one calendar ID per line')
+@click.option('--days', default=90, show_default=True, help='Days ahead to analyze')
+@click.option('--work-hours', default='9-17', show_default=True, help='Working hours, e.g. 8-18')
+@click.option('--include-weekends', is_flag=True, help='Count weekends as working days')
+@click.option('--format', 'output_format', type=click.Choice(['json', 'csv']), default='json',
+              show_default=True, help='Report format')
+@click.option('--output', '-o', type=click.File('w'), default='-', help='Where to write the report')
+@click.option('--credentials-file', envvar='GOOGLE_CREDENTIALS_FILE', 
+              default='credentials.json', help='Google Calendar credentials file')
+@click.option('--token-file', envvar='GOOGLE_TOKEN_FILE', 
+              default='token.json', help='Google Calendar token file')
+@click.option('--calendar-id', envvar='DEFAULT_CALENDAR_ID', 
+              default='primary', help='Calendar analyzed when no calendars are given')
+def analyze(calendar_ids, calendars_file, days, work_hours, include_weekends, output_format, output,
+            credentials_file, token_file, calendar_id):
+    """Report utilization, fragmentation and free-block lengths of calendars"""
+    
+    # Load environment variables
+    load_dotenv()
+    
+    if not _replaying() and not os.path.exists(credentials_file):
+        click.echo(f"Error: Google credentials file not found: {credentials_file}", err=True)
+        return
+    
+    try:
+        work_start, work_end = (int(hour) for hour in work_hours.split('-'))
+    except ValueError:
+        raise click.BadParameter("expected START-END hours, e.g. 9-17", param_hint='--work-hours')
+    
+    calendars = list(calendar_ids)
+    if calendars_file:
+        calendars.extend(line.strip() for line in calendars_file if line.strip())
+    
+    try:
+        calendar_agent = _calendar_agent(credentials_file, token_file, calendar_id)
+        analyzer = CalendarAnalyzer(calendar_agent, work_start_hour=work_start, work_end_hour=work_end,
+                                    include_weekends=include_weekends)
+        
+        start_time = datetime.now().replace(minute=0, second=0, microsecond=0)
+        report = analyzer.analyze(calendars or [calendar_id], start_time, start_time + timedelta(days=days))
+        
+        if output_format == 'json':
+            output.write(json.dumps(report, indent=2) + "\n")
+        else:
+            writer = csv.DictWriter(output, fieldnames=[
+                'calendar_id', 'working_minutes', 'busy_minutes', 'utilization', 'free_blocks',
+                'fragmentation', 'free_block_p50', 'free_block_p90', 'error'
+            ])
+            writer.writeheader()
+            writer.writerows(report['calendars'])
+        
+        summary = report['summary']
+        click.echo(f"Analyzed {summary['calendars']} calendars: {summary['utilization']:.0%} utilized, "
+                   f"{summary['fragmentation']:.0%} of free time fragmented", err=True)
+        if summary['unreadable']:
+            click.echo(f"Could not read {summary['unreadable']} calendars; see their error column",
+                       err=True)
+            
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+        exit(1)
+
+
 @cli.command()
 def setup():
     """Setup CalPal with required credentials"""
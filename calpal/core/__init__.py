@@ -4,16 +4,57 @@ CalPal Core Module
 Contains the core functionality including models, agents, and business logic.
 """
 
-from .models import MeetingRequest, TimeSlot, CalendarEvent
+from .models import (
+    MeetingRequest, TimeSlot, CalendarEvent, BusyPeriod, SlotSearch, PlannedMeeting, SchedulePlan,
+    EventResult, ScheduleOutcome, StageError, ScheduleResult, Contact, AttendeeResolution, Room, Tenant
+)
 from .parser_agent import ParserAgent
 from .calendar_agent import CalendarAgent
 from .scheduler_agent import SchedulerAgent
+from .booking import BookingAgent, SlotReservations
+from .scheduler_pool import SchedulerPool
+from .planner import PlannerAgent
+from .events import EventCallback, logging_callback
+from .directory import AttendeeDirectory
+from .rooms import RoomAgent
+from .warmer import AvailabilityWarmer
+from .replay import InteractionSession, Recorder, Replayer
+from .response_repair import ResponseRepairer
+from .analytics import CalendarAnalyzer
+from .tenants import TenantRegistry
 
 __all__ = [
     'MeetingRequest',
     'TimeSlot', 
     'CalendarEvent',
+    'BusyPeriod',
+    'SlotSearch',
+    'PlannedMeeting',
+    'SchedulePlan',
+    'EventResult',
+    'ScheduleOutcome',
+    'StageError',
+    'ScheduleResult',
+    'Contact',
+    'AttendeeResolution',
+    'Room',
+    'Tenant',
     'ParserAgent',
     'CalendarAgent',
-    'SchedulerAgent'
+    'SchedulerAgent',
+    'BookingAgent',
+    'SlotReservations',
+    'SchedulerPool',
+    'PlannerAgent',
+    'EventCallback',
+    'logging_callback',
+    'AttendeeDirectory',
+    'RoomAgent',
+    'AvailabilityWarmer',
+    'InteractionSession',
+    'Recorder',
+    'Replayer',
+    'ResponseRepairer',
+    'CalendarAnalyzer',
+    'TenantRegistry'
 ]
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Booking Agent - Conflict-safe event creation for concurrent schedulers
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from .models import TimeSlot, CalendarEvent, EventResult
+from .calendar_agent import CalendarAgent
+from .events import EventCallback, ignore_event
+from ..exceptions.calpal_exceptions import SlotConflictError
+
+
+class SlotReservations:
+    """In-process holds on time slots, shared by every scheduler in the process
+    
+    A hold is taken before a slot is re-verified and booked, so two workers
+    can never race to insert the same slot. Holds on booked slots are kept
+    until they expire to cover the delay before freebusy reflects the new event.
+    Holds are keyed by calendar; see BookingAgent.calendar_key.
+    """
+    
+    def __init__(self, hold_seconds: float = 60.0):
+        self.hold_seconds = hold_seconds
+        self._lock = threading.Lock()
+        self._holds: Dict[str, List[Tuple[datetime, datetime, float]]] = {}
+    
+    def reserve(self, calendar_id: str, start_time: datetime, end_time: datetime) -> bool:
+        """Hold a slot; returns False if it overlaps an existing hold"""
+        now = time.monotonic()
+        with self._lock:
+            holds = [hold for hold in self._holds.get(calendar_id, []) if hold[2] > now]
+            for held_start, held_end, _ in holds:
+                if start_time < held_end and end_time > held_start:
+                    self._holds[calendar_id] = holds
+                    return False
+            
+            holds.append((start_time, end_time, now + self.hold_seconds))
+            self._holds[calendar_id] = holds
+            return True
+    
+    def release(self, calendar_id: str, start_time: datetime, end_time: datetime):
+        """Drop the hold on a slot"""
+        with self._lock:
+            holds = self._holds.get(calendar_id, [])
+            self._holds[calendar_id] = [
+                hold for hold in holds
+                if not (hold[0] == start_time and hold[1] == end_time)
+            ]
+
+
+# Process-wide reservations so separate SchedulerAgents never collide
+default_reservations = SlotReservations()
+
+
+class BookingAgent:
+    """Agent that books the best still-free slot out of a ranked candidate list
+    
+    For each candidate it takes an in-process hold, re-verifies the slot with
+    a freebusy query covering only that slot, and inserts the event. A conflict
+    at either step moves on to the next-ranked candidate.
+    """
+    
+    def __init__(self, calendar_agent: CalendarAgent,
+                 reservations: Optional[SlotReservations] = None,
+                 max_attempts: int = 5, on_event: Optional[EventCallback] = None):
+        self.calendar_agent = calendar_agent
+        self.reservations = reservations or default_reservations
+        self.max_attempts = max_attempts
+        self.on_event = on_event or ignore_event
+    
+    def book(self, event: CalendarEvent, candidates: List[TimeSlot],
+             attendee_calendar_ids: Optional[List[str]] = None) -> EventResult:
+        """Book the event in the first candidate slot that is still free
+        
+        The event's own start and end times are replaced by the booked slot's.
+        Attendee calendars are re-verified along with ours. A slot with a room
+        also books the room: the room calendar is held, re-verified and
+        invited along with the attendees.
+        Raises SlotConflictError when no candidate could be booked.
+        """
+        errors = []
+        
+        for slot in candidates[:self.max_attempts]:
+            held = self._hold(slot)
+            if not held:
+                self.on_event('booking.held', {'slot': slot})
+                continue
+            
+            result = None
+            try:
+                calendar_ids = list(attendee_calendar_ids or [])
+                if slot.room:
+                    calendar_ids.append(slot.room.calendar_id)
+                is_free = self.calendar_agent.is_slot_free(
+                    slot.start_time, slot.end_time, attendee_calendar_ids=calendar_ids)
+                if not is_free:
+                    self.on_event('booking.conflict', {'slot': slot})
+                    continue
+                
+                update = {'start_time': slot.start_time, 'end_time': slot.end_time}
+                if slot.room:
+                    update['location'] = slot.room.name
+                    update['attendees'] = event.attendees + [slot.room.calendar_id]
+                
+                result = self.calendar_agent.create_event(event.model_copy(update=update))
+                if result.success:
+                    return result
+                errors.append(result.error)
+                self.on_event('booking.failed', {'slot': slot, 'error': result.error})
+            except HttpError as error:
+                errors.append(f"Failed to verify slot: {error}")
+                self.on_event('booking.failed', {'slot': slot, 'error': str(error)})
+            finally:
+                # Keep the hold on a booked slot until freebusy catches up
+                if result is None or not result.success:
+                    for calendar_id in held:
+                        self.reservations.release(calendar_id, slot.start_time, slot.end_time)
+        
+        message = "No candidate slot could be booked without a conflict"
+        if errors:
+            message += f" (last error: {errors[-1]})"
+        raise SlotConflictError(message)
+    
+    def calendar_key(self) -> str:
+        """Reservation key for our calendar
+        
+        'primary' names a different calendar for every account, so it is
+        qualified with the account's token file; other calendar IDs are
+        global and shared by every account that books into them.
+        """
+        calendar_id = self.calendar_agent.calendar_id
+        if calendar_id == 'primary':
+            return f"{os.path.abspath(self.calendar_agent.token_file)}#primary"
+        return calendar_id
+    
+    def _hold(self, slot: TimeSlot) -> List[str]:
+        """Hold the slot on our calendar and its room, returning the held calendar keys
+        
+        Returns an empty list, holding nothing, if any of them is already held.
+        """
+        calendar_ids = [self.calendar_key()]
+        if slot.room:
+            calendar_ids.append(slot.room.calendar_id)
+        
+        held = []
+        for calendar_id in calendar_ids:
+            if not self.reservations.reserve(calendar_id, slot.start_time, slot.end_time):
+                for held_id in held:
+                    self.reservations.release(held_id, slot.start_time, slot.end_time)
+                return []
+            held.append(calendar_id)
+        return held
@@ -2,142 +2,426 @@
 Calendar Agent - Handles Google Calendar operations
 """
 
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from datetime import datetime, timedelta
-import os
+from collections import deque
+from datetime import datetime, time as dt_time, timedelta
 import re
-from typing import List, Optional
-import pickle
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
 
-from .models import TimeSlot, CalendarEvent
+from . import intervals
+from .models import TimeSlot, CalendarEvent, BusyPeriod, SlotSearch, EventResult
+from .credentials import CredentialManager
+from .replay import InteractionSession
+from ..exceptions.calpal_exceptions import CalendarError, ConfigurationError
+from ..utils.helpers import is_email
+
+
+class _CachedBusy(NamedTuple):
+    """Busy periods of one calendar over the window they were fetched for"""
+    window_start: datetime
+    window_end: datetime
+    busy: List[Tuple[datetime, datetime]]
+    fetched_at: float  # time.monotonic()
+
+
+class BusyQuery(NamedTuple):
+    """One recorded freebusy request, used to decide what to prefetch"""
+    calendar_ids: Tuple[str, ...]
+    start_time: datetime
+    end_time: datetime
+
+
+class BusyTimes(Dict[str, List[Tuple[datetime, datetime]]]):
+    """Busy periods per readable calendar
+    
+    Calendars the API could not read, e.g. unknown or not shared with us,
+    are left out of the mapping and listed in errors with the reason, so
+    they are never mistaken for calendars with nothing booked.
+    """
+    
+    def __init__(self, busy=(), errors: Optional[Dict[str, str]] = None):
+        super().__init__(busy)
+        self.errors: Dict[str, str] = dict(errors or {})
 
 
 class CalendarAgent:
-    """Agent responsible for Google Calendar operations"""
+    """Agent responsible for Google Calendar operations
+    
+    Slots are searched on a step_minutes grid aligned to the start of
+    working hours. Freebusy results are cached per calendar for
+    freebusy_ttl seconds, and recent queries are kept so a warmer (see
+    start_warmer) can refresh the calendars and windows that are asked for
+    most before they are needed.
+    """
     
     SCOPES = ['https://www.googleapis.com/auth/calendar']
+    BATCH_SIZE = 50  # Calendar API limit on requests per batch
+    FREEBUSY_MAX_ITEMS = 50  # Calendar API limit on calendars per freebusy query
     
-    def __init__(self, credentials_file: str, token_file: str, calendar_id: Optional[str] = None):
+    def __init__(self, credentials_file: str, token_file: str, calendar_id: Optional[str] = None,
+                 freebusy_ttl: float = 300, history_size: int = 200,
+                 session: Optional[InteractionSession] = None,
+                 step_minutes: int = 30, work_hours: Tuple[int, int] = (9, 17),
+                 max_days_ahead: int = 28,
+                 service_factory: Optional[Callable[[Any], Any]] = None):
+        if step_minutes <= 0 or 60 % step_minutes:
+            raise ConfigurationError(f"step_minutes must divide an hour evenly, got {step_minutes}")
+        
         self.credentials_file = credentials_file
         self.token_file = token_file
         self.calendar_id = calendar_id or 'primary'
-        self.service = None
-        self._authenticate()
+        self.step_minutes = step_minutes
+        self.work_hours = work_hours
+        self.max_days_ahead = max_days_ahead
+        self.freebusy_ttl = freebusy_ttl
+        # Records or replays every API call when set
+        self.session = session
+        # Builds a service from credentials, e.g. over a shared connection pool
+        self.service_factory = service_factory
+        self.credential_manager = None
+        self.credentials = None
+        # googleapiclient services are not thread-safe, so each thread gets its own
+        self._local = threading.local()
+        self._busy_cache: Dict[str, _CachedBusy] = {}
+        self._history: Deque[BusyQuery] = deque(maxlen=history_size)
+        self._cache_lock = threading.Lock()
+        # A replayed session needs no Google account
+        if session is None or not session.offline:
+            self._authenticate()
     
-    def _authenticate(self):
-        """Authenticate with Google Calendar API"""
-        creds = None
-        
-        # Load existing token
-        if os.path.exists(self.token_file):
-            with open(self.token_file, 'rb') as token:
-                creds = pickle.load(token)
+    @property
+    def service(self):
+        """Calendar API service for the calling thread"""
+        # Refreshes the shared credentials in place shortly before they expire
+        if self.credential_manager is not None:
+            self.credential_manager.get_credentials()
         
-        # If there are no (valid) credentials available, let the user log in
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            if self.session is None:
+                service = self._build_service()
+            elif self.session.offline:
+                service = self.session.wrap_service(None)
             else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_file, self.SCOPES)
-                creds = flow.run_local_server(port=0)
-            
-            # Save the credentials for the next run
-            with open(self.token_file, 'wb') as token:
-                pickle.dump(creds, token)
-        
-        self.service = build('calendar', 'v3', credentials=creds)
+                service = self.session.wrap_service(self._build_service())
+            self._local.service = service
+        return service
+    
+    @service.setter
+    def service(self, service):
+        self._local.service = service
+    
+    def _build_service(self):
+        """Build a Calendar API service from the current credentials"""
+        if self.service_factory is not None:
+            return self.service_factory(self.credentials)
+        return build('calendar', 'v3', credentials=self.credentials)
+    
+    def _authenticate(self):
+        """Authenticate with Google Calendar API"""
+        # Credentials are shared by every agent using the same token file
+        self.credential_manager = CredentialManager.for_token_file(
+            self.credentials_file, self.token_file, self.SCOPES)
+        self.credentials = self.credential_manager.get_credentials()
     
     def find_available_slots(self, duration_minutes: int, time_constraint: str, 
-                           days_ahead: int = 7) -> List[TimeSlot]:
+                           days_ahead: Optional[int] = None,
+                           attendee_calendar_ids: Optional[List[str]] = None) -> List[TimeSlot]:
         """Find available time slots for a meeting"""
         try:
-            # Parse time constraint to get start and end times
-            start_time, end_time = self._parse_time_constraint(time_constraint, days_ahead)
+            return self.search_slots(duration_minutes, time_constraint, days_ahead,
+                                     attendee_calendar_ids=attendee_calendar_ids).slots
             
-            # Get busy times from calendar
-            freebusy_query = {
-                'timeMin': start_time.isoformat() + 'Z',
-                'timeMax': end_time.isoformat() + 'Z',
-                'items': [{'id': self.calendar_id}]
-            }
+        except HttpError as error:
+            raise CalendarError(f"Failed to query availability: {error}") from error
+    
+    def search_slots(self, duration_minutes: int, time_constraint: str,
+                     days_ahead: Optional[int] = None,
+                     extra_busy: Optional[List[BusyPeriod]] = None,
+                     max_slots: int = 5,
+                     attendee_calendar_ids: Optional[List[str]] = None) -> SlotSearch:
+        """Search for free slots and return them with the busy periods that were considered
+        
+        extra_busy marks additional periods as taken, e.g. slots already
+        chosen for other meetings in the same plan. Busy times of any
+        attendee calendars are included in the same freebusy query.
+        
+        Without days_ahead the horizon adapts: the search covers one day,
+        then doubles the horizon up to max_days_ahead until max_slots
+        candidates are found. Each widening only queries the new days and
+        keeps the busy times already fetched.
+        """
+        max_days = days_ahead or self.max_days_ahead
+        horizon = days_ahead or 1
+        
+        # Parse time constraint to get the start time
+        start_time, _ = self._parse_time_constraint(time_constraint, max_days)
+        duration = timedelta(minutes=duration_minutes)
+        step = timedelta(minutes=self.step_minutes)
+        work_start, work_end = (dt_time(hour) for hour in self.work_hours)
+        
+        busy_times = [(period.start_time, period.end_time) for period in extra_busy or []]
+        fetched_until = start_time
+        while True:
+            end_time = start_time + timedelta(days=horizon)
+            busy_times += self.get_busy_times(fetched_until, end_time, attendee_calendar_ids)
+            fetched_until = end_time
+            merged = intervals.merge(busy_times)
+            
+            free = intervals.working_slots(merged, start_time, end_time, duration, step,
+                                           work_start, work_end, limit=max_slots)
+            if len(free) >= max_slots or horizon >= max_days:
+                break
+            horizon = min(horizon * 2, max_days)
+        
+        return SlotSearch(
+            window_start=start_time,
+            window_end=end_time,
+            busy=[BusyPeriod(start_time=busy_start, end_time=busy_end)
+                  for busy_start, busy_end in merged],
+            slots=[TimeSlot(start_time=slot_start, end_time=slot_end, duration_minutes=duration_minutes)
+                   for slot_start, slot_end in free]
+        )
+    
+    def is_slot_free(self, start_time: datetime, end_time: datetime,
+                     attendee_calendar_ids: Optional[List[str]] = None) -> bool:
+        """Re-check a single slot with a freebusy query narrowed to that slot
+        
+        Always goes to the API: this is the last check before writing, so
+        cached busy times are not trusted here.
+        """
+        busy_times = intervals.merge(self.get_busy_times(start_time, end_time, attendee_calendar_ids,
+                                                         max_age=0))
+        return not intervals.overlaps(busy_times, start_time, end_time)
+    
+    def get_busy_times(self, start_time: datetime, end_time: datetime,
+                       attendee_calendar_ids: Optional[List[str]] = None,
+                       max_age: Optional[float] = None) -> List[Tuple[datetime, datetime]]:
+        """Query freebusy for the calendar and return busy periods as naive datetimes
+        
+        Attendee calendars are queried in the same request and their busy
+        periods merged in; calendars we cannot read are skipped. Pass
+        max_age=0 to bypass the cache.
+        """
+        calendar_ids = [self.calendar_id] + list(attendee_calendar_ids or [])
+        busy_by_calendar = self.get_busy_times_by_calendar(calendar_ids, start_time, end_time, max_age)
+        return [period for busy_times in busy_by_calendar.values() for period in busy_times]
+    
+    def get_busy_times_by_calendar(self, calendar_ids: List[str], start_time: datetime,
+                                   end_time: datetime,
+                                   max_age: Optional[float] = None) -> BusyTimes:
+        """Return busy periods per calendar, from the cache where it is fresh enough
+        
+        Calendars whose cached window covers the request and is at most
+        max_age seconds old (default freebusy_ttl) are answered from memory;
+        the rest are fetched with fetch_busy_times and cached. Calendars that
+        could not be read are listed in the result's errors.
+        """
+        calendar_ids = list(dict.fromkeys(calendar_ids))
+        max_age = self.freebusy_ttl if max_age is None else max_age
+        now = time.monotonic()
+        
+        busy_by_calendar = {}
+        missing = []
+        with self._cache_lock:
+            self._history.append(BusyQuery(tuple(calendar_ids), start_time, end_time))
+            for calendar_id in calendar_ids:
+                cached = self._busy_cache.get(calendar_id)
+                if (cached is not None and now - cached.fetched_at <= max_age
+                        and cached.window_start <= start_time and cached.window_end >= end_time):
+                    busy_by_calendar[calendar_id] = [
+                        (busy_start, busy_end) for busy_start, busy_end in cached.busy
+                        if busy_start < end_time and busy_end > start_time
+                    ]
+                else:
+                    missing.append(calendar_id)
+        
+        errors = {}
+        if missing:
+            fetched = self.fetch_busy_times(missing, start_time, end_time)
+            busy_by_calendar.update(fetched)
+            errors = fetched.errors
+        return BusyTimes(((calendar_id, busy_by_calendar[calendar_id]) for calendar_id in calendar_ids
+                          if calendar_id in busy_by_calendar), errors)
+    
+    def recent_queries(self) -> List[BusyQuery]:
+        """Freebusy queries made recently, oldest first"""
+        with self._cache_lock:
+            return list(self._history)
+    
+    def fetch_busy_times(self, calendar_ids: List[str], start_time: datetime,
+                         end_time: datetime) -> BusyTimes:
+        """Query freebusy for many calendars, bypassing the cache, and cache the result
+        
+        Calendars are queried up to FREEBUSY_MAX_ITEMS at a time. When more
+        than one query is needed, the queries go out in a single batch request,
+        so checking 50 rooms costs one round trip just like checking one.
+        Calendars the API reports errors for are listed in the result's errors
+        and not cached.
+        """
+        calendar_ids = list(dict.fromkeys(calendar_ids))
+        fetched_at = time.monotonic()
+        chunks = [calendar_ids[offset:offset + self.FREEBUSY_MAX_ITEMS]
+                  for offset in range(0, len(calendar_ids), self.FREEBUSY_MAX_ITEMS)]
+        queries = [self.service.freebusy().query(body={
+            'timeMin': start_time.isoformat() + 'Z',
+            'timeMax': end_time.isoformat() + 'Z',
+            'items': [{'id': calendar_id} for calendar_id in chunk]
+        }) for chunk in chunks]
+        
+        responses = []
+        if len(queries) == 1:
+            responses.append(queries[0].execute())
+        else:
+            errors = []
             
-            freebusy_result = self.service.freebusy().query(body=freebusy_query).execute()
-            busy_times = freebusy_result['calendars'][self.calendar_id]['busy']
+            def on_response(request_id, response, exception):
+                if exception is not None:
+                    errors.append(exception)
+                else:
+                    responses.append(response)
             
-            # Find free slots
-            available_slots = []
-            current_time = start_time
+            for offset in range(0, len(queries), self.BATCH_SIZE):
+                batch = self.service.new_batch_http_request(callback=on_response)
+                for query in queries[offset:offset + self.BATCH_SIZE]:
+                    batch.add(query)
+                batch.execute()
             
-            while current_time + timedelta(minutes=duration_minutes) <= end_time:
-                slot_end = current_time + timedelta(minutes=duration_minutes)
-                
-                # Check if this slot conflicts with busy times
-                is_free = True
-                for busy_period in busy_times:
+            if errors:
+                raise errors[0]
+        
+        busy_by_calendar = BusyTimes((calendar_id, []) for calendar_id in calendar_ids)
+        for response in responses:
+            for calendar_id, calendar in response.get('calendars', {}).items():
+                if calendar_id not in busy_by_calendar:
+                    continue
+                if calendar.get('errors'):
+                    # e.g. notFound or forbidden: nothing is known about this calendar
+                    busy_by_calendar.errors[calendar_id] = ', '.join(
+                        error.get('reason', 'unknown') for error in calendar['errors'])
+                    del busy_by_calendar[calendar_id]
+                    continue
+                for busy_period in calendar.get('busy', []):
                     busy_start = datetime.fromisoformat(busy_period['start'].replace('Z', '+00:00'))
                     busy_end = datetime.fromisoformat(busy_period['end'].replace('Z', '+00:00'))
                     
                     # Convert to naive datetime for comparison
-                    busy_start = busy_start.replace(tzinfo=None)
-                    busy_end = busy_end.replace(tzinfo=None)
-                    
-                    if (current_time < busy_end and slot_end > busy_start):
-                        is_free = False
-                        break
-                
-                if is_free:
-                    available_slots.append(TimeSlot(
-                        start_time=current_time,
-                        end_time=slot_end,
-                        duration_minutes=duration_minutes
-                    ))
-                
-                # Move to next 30-minute slot
-                current_time += timedelta(minutes=30)
-            
-            return available_slots[:5]  # Return top 5 options
-            
-        except HttpError as error:
-            print(f"An error occurred: {error}")
-            return []
+                    busy_by_calendar[calendar_id].append(
+                        (busy_start.replace(tzinfo=None), busy_end.replace(tzinfo=None)))
+        
+        with self._cache_lock:
+            for calendar_id, busy_times in busy_by_calendar.items():
+                cached = self._busy_cache.get(calendar_id)
+                if (cached is not None and fetched_at - cached.fetched_at <= self.freebusy_ttl
+                        and start_time <= cached.window_end and end_time >= cached.window_start
+                        and not (start_time <= cached.window_start and end_time >= cached.window_end)):
+                    # A re-check inside, or a widening next to, a fresh window extends it
+                    # instead of replacing it; it stays as fresh as its oldest part
+                    self._busy_cache[calendar_id] = _CachedBusy(
+                        min(cached.window_start, start_time), max(cached.window_end, end_time),
+                        [(busy_start, busy_end) for busy_start, busy_end in cached.busy
+                         if busy_start < start_time or busy_end > end_time] + busy_times,
+                        cached.fetched_at)
+                else:
+                    self._busy_cache[calendar_id] = _CachedBusy(start_time, end_time, list(busy_times), fetched_at)
+        
+        return busy_by_calendar
+    
+    def _note_busy(self, event: CalendarEvent):
+        """Add a created event to cached busy times so cached data stays consistent with our writes"""
+        with self._cache_lock:
+            for calendar_id in [self.calendar_id] + event.attendees:
+                cached = self._busy_cache.get(calendar_id)
+                if cached is not None:
+                    cached.busy.append((event.start_time, event.end_time))
+    
+    def start_warmer(self, **kwargs) -> 'AvailabilityWarmer':
+        """Start a background warmer that prefetches freebusy for likely requests
+        
+        Keyword arguments are passed to AvailabilityWarmer. Call stop() on the
+        returned warmer to end it.
+        """
+        from .warmer import AvailabilityWarmer
+        warmer = AvailabilityWarmer(self, **kwargs)
+        warmer.start()
+        return warmer
     
-    def create_event(self, event: CalendarEvent) -> bool:
+    def create_event(self, event: CalendarEvent) -> EventResult:
         """Create a calendar event"""
         try:
-            event_body = {
-                'summary': event.summary,
-                'start': {
-                    'dateTime': event.start_time.isoformat(),
-                    'timeZone': 'UTC',
-                },
-                'end': {
-                    'dateTime': event.end_time.isoformat(),
-                    'timeZone': 'UTC',
-                },
-                'attendees': [{'email': email} for email in event.attendees],
-            }
-            
-            if event.location:
-                event_body['location'] = event.location
-            
-            if event.description:
-                event_body['description'] = event.description
-            
             created_event = self.service.events().insert(
                 calendarId=self.calendar_id,
-                body=event_body
+                body=self._event_body(event)
             ).execute()
             
-            print(f"Event created: {created_event.get('htmlLink')}")
-            return True
+            self._note_busy(event)
+            return EventResult(event=event, link=created_event.get('htmlLink'))
             
         except HttpError as error:
-            print(f"An error occurred while creating event: {error}")
-            return False
+            return EventResult(event=event, error=f"Failed to create event: {error}")
+    
+    def create_events(self, events: List[CalendarEvent]) -> List[EventResult]:
+        """Create many calendar events with batched API requests
+        
+        Returns one result per event, in order.
+        """
+        results = [EventResult(event=event, error="Event was not sent") for event in events]
+        
+        def on_response(request_id, response, exception):
+            index = int(request_id)
+            if exception is not None:
+                results[index] = EventResult(event=events[index], error=f"Failed to create event: {exception}")
+            else:
+                self._note_busy(events[index])
+                results[index] = EventResult(event=events[index], link=response.get('htmlLink'))
+        
+        try:
+            for offset in range(0, len(events), self.BATCH_SIZE):
+                batch = self.service.new_batch_http_request(callback=on_response)
+                for index, event in enumerate(events[offset:offset + self.BATCH_SIZE], offset):
+                    batch.add(self.service.events().insert(
+                        calendarId=self.calendar_id,
+                        body=self._event_body(event)
+                    ), request_id=str(index))
+                batch.execute()
+        
+        except HttpError as error:
+            for index, result in enumerate(results):
+                if result.error == "Event was not sent":
+                    results[index] = EventResult(event=result.event, error=f"Failed to create event: {error}")
+        
+        return results
+    
+    def _event_body(self, event: CalendarEvent) -> dict:
+        """Build the Calendar API request body for an event"""
+        event_body = {
+            'summary': event.summary,
+            'start': {
+                'dateTime': event.start_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+            'end': {
+                'dateTime': event.end_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+            # Bare names are not valid attendees for the Calendar API
+            'attendees': [{'email': email} for email in event.attendees if is_email(email)],
+        }
+        
+        if event.location:
+            event_body['location'] = event.location
+        
+        if event.description:
+            event_body['description'] = event.description
+        
+        return event_body
+    
+    def get_search_window(self, time_constraint: str, days_ahead: int = 7) -> Tuple[datetime, datetime]:
+        """Return the start and end of the window searched for a time constraint"""
+        return self._parse_time_constraint(time_constraint, days_ahead)
     
     def _parse_time_constraint(self, time_constraint: str, days_ahead: int) -> tuple[datetime, datetime]:
         """Parse time constraint string to get start and end times"""
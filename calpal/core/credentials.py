@@ -0,0 +1,177 @@
+"""
+Credential Manager - Shared, lock-safe OAuth token cache for Google Calendar
+"""
+
+from google_auth_oauthlib.flow import InstalledAppFlow
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import json
+import os
+import pickle
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+from ..exceptions.calpal_exceptions import AuthenticationError
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+
+class CredentialManager:
+    """Holds credentials for one token file in memory and refreshes them in one place
+    
+    Every agent and worker using the same token file shares a single manager,
+    so the token is read once and refreshed once, shortly before it expires.
+    Refreshes are serialized across threads with a lock and across processes
+    with a lock file, and the token file is replaced atomically.
+    """
+    
+    _instances: Dict[str, 'CredentialManager'] = {}
+    _instances_lock = threading.Lock()
+    
+    def __init__(self, credentials_file: str, token_file: str, scopes: List[str],
+                 refresh_margin: timedelta = timedelta(minutes=5)):
+        self.credentials_file = credentials_file
+        self.token_file = token_file
+        self.scopes = scopes
+        self.refresh_margin = refresh_margin
+        self._credentials: Optional[Credentials] = None
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def for_token_file(cls, credentials_file: str, token_file: str,
+                       scopes: List[str]) -> 'CredentialManager':
+        """Return the process-wide manager for a token file"""
+        key = os.path.abspath(token_file)
+        with cls._instances_lock:
+            manager = cls._instances.get(key)
+            if manager is None:
+                manager = cls(credentials_file, token_file, scopes)
+                cls._instances[key] = manager
+            return manager
+    
+    @classmethod
+    def release(cls, token_file: str):
+        """Forget the process-wide manager for a token file
+        
+        Agents still holding the manager keep working; the next
+        for_token_file call reads the token file again.
+        """
+        with cls._instances_lock:
+            cls._instances.pop(os.path.abspath(token_file), None)
+    
+    def get_credentials(self) -> Credentials:
+        """Return valid credentials, refreshing them if they are about to expire
+        
+        The same Credentials object is returned on every call and updated in
+        place, so API services built from it always see the current token.
+        """
+        creds = self._credentials
+        if creds is not None and not self._needs_refresh(creds):
+            return creds
+        
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            if self._credentials is not None and not self._needs_refresh(self._credentials):
+                return self._credentials
+            
+            try:
+                fresh = self._load_or_refresh()
+            except RefreshError as e:
+                raise AuthenticationError(f"Failed to refresh Google credentials: {e}") from e
+            
+            if self._credentials is None:
+                self._credentials = fresh
+            elif fresh is not self._credentials:
+                self._credentials.token = fresh.token
+                self._credentials.expiry = fresh.expiry
+                # Re-authorizing issues a new refresh token and revokes the old one
+                self._credentials._refresh_token = fresh.refresh_token
+            return self._credentials
+    
+    def _needs_refresh(self, creds: Credentials) -> bool:
+        """Check whether credentials are invalid or expire within the refresh margin"""
+        if not creds.valid:
+            return True
+        if creds.expiry is None:
+            return False
+        # google-auth keeps expiry as naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return creds.expiry - now < self.refresh_margin
+    
+    def _load_or_refresh(self) -> Credentials:
+        """Load the token file, refreshing or re-authorizing if needed"""
+        with self._file_lock():
+            # Another process may already have written a fresh token
+            creds = self._read_token()
+            if creds is not None and not self._needs_refresh(creds):
+                return creds
+            
+            if self._credentials is not None and self._credentials.refresh_token:
+                creds = self._credentials
+            
+            if creds and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    self.credentials_file, self.scopes)
+                creds = flow.run_local_server(port=0)
+            
+            self._write_token(creds)
+            return creds
+    
+    def _read_token(self) -> Optional[Credentials]:
+        """Read credentials from the token file, migrating legacy pickled tokens"""
+        if not os.path.exists(self.token_file):
+            return None
+        
+        with open(self.token_file, 'rb') as token:
+            raw = token.read()
+        
+        if raw.lstrip().startswith(b'{'):
+            try:
+                return Credentials.from_authorized_user_info(json.loads(raw), self.scopes)
+            except ValueError:
+                # Unusable token (e.g. no refresh token), authorize again
+                return None
+        
+        # Tokens written by earlier versions were pickled
+        creds = pickle.loads(raw)
+        self._write_token(creds)
+        return creds
+    
+    def _write_token(self, creds: Credentials):
+        """Atomically replace the token file with the given credentials"""
+        directory = os.path.dirname(os.path.abspath(self.token_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.token-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as tmp:
+                tmp.write(creds.to_json())
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.token_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    @contextmanager
+    def _file_lock(self):
+        """Hold an exclusive lock shared by every process using this token file"""
+        if fcntl is None:
+            yield
+            return
+        
+        with open(self.token_file + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,189 @@
+"""
+Attendee Directory - Resolves attendee names to emails and calendars from local contacts
+"""
+
+import bisect
+import csv
+import difflib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Contact, MeetingRequest, AttendeeResolution
+from ..exceptions.calpal_exceptions import ConfigurationError
+from ..utils.helpers import is_email
+
+
+class AttendeeDirectory:
+    """In-memory index of contacts for resolving attendee names without API calls
+    
+    Contacts are indexed by full name, each name part, aliases and the local
+    part of their email. A name resolves by exact match first, then by unique
+    prefix, then by fuzzy match. Results for the cache_size most recently
+    used names are cached, so repeated lookups are a single dict access.
+    """
+    
+    def __init__(self, contacts: Iterable[Contact] = (), fuzzy_cutoff: float = 0.8,
+                 cache_size: int = 4096):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.cache_size = cache_size
+        self._index: Dict[str, List[Contact]] = {}
+        self._sorted_keys: List[str] = []
+        self._cache: 'OrderedDict[str, Optional[Contact]]' = OrderedDict()
+        # Bumped by add() so lookups that raced with it are not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+        for contact in contacts:
+            self._index_contact(contact)
+        self._sorted_keys = sorted(self._index)
+    
+    @classmethod
+    def from_file(cls, path: str) -> 'AttendeeDirectory':
+        """Load contacts from a CSV, JSON or SQLite file, chosen by extension"""
+        if path.endswith('.csv'):
+            return cls.from_csv(path)
+        if path.endswith('.json'):
+            return cls.from_json(path)
+        if path.endswith(('.db', '.sqlite', '.sqlite3')):
+            return cls.from_sqlite(path)
+        raise ConfigurationError(f"Unsupported contacts file: {path}")
+    
+    @classmethod
+    def from_csv(cls, path: str) -> 'AttendeeDirectory':
+        """Load contacts from a CSV file with name, email and optional calendar_id, aliases columns
+        
+        Aliases are separated by semicolons.
+        """
+        with open(path, newline='', encoding='utf-8') as contacts_file:
+            return cls(cls._contact_from_row(row) for row in csv.DictReader(contacts_file))
+    
+    @classmethod
+    def from_json(cls, path: str) -> 'AttendeeDirectory':
+        """Load contacts from a JSON list of contact objects"""
+        with open(path, encoding='utf-8') as contacts_file:
+            return cls(Contact(**entry) for entry in json.load(contacts_file))
+    
+    @classmethod
+    def from_sqlite(cls, path: str, table: str = 'contacts') -> 'AttendeeDirectory':
+        """Load contacts from a SQLite table with the same columns as the CSV format"""
+        connection = sqlite3.connect(path)
+        connection.row_factory = sqlite3.Row
+        try:
+            rows = connection.execute(f'SELECT * FROM "{table}"').fetchall()
+        finally:
+            connection.close()
+        return cls(cls._contact_from_row(dict(row)) for row in rows)
+    
+    def add(self, contact: Contact):
+        """Add a contact to the directory"""
+        with self._lock:
+            self._index_contact(contact)
+            self._sorted_keys = sorted(self._index)
+            self._cache.clear()
+            self._generation += 1
+    
+    def resolve(self, name: str) -> Optional[Contact]:
+        """Resolve a name, alias or email to a contact, or None if unknown or ambiguous"""
+        key = self._normalize(name)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            generation = self._generation
+        
+        # Looked up outside the lock so slow fuzzy matches do not block other workers
+        contact = self._lookup(name, key)
+        with self._lock:
+            if generation == self._generation:
+                self._cache[key] = contact
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return contact
+    
+    def resolve_many(self, names: Iterable[str]) -> Tuple[List[Contact], List[str]]:
+        """Resolve several names, returning the contacts found and the names that were not"""
+        contacts = []
+        unresolved = []
+        seen = set()
+        for name in names:
+            contact = self.resolve(name)
+            if contact is None:
+                unresolved.append(name)
+            elif contact.email not in seen:
+                seen.add(contact.email)
+                contacts.append(contact)
+        return contacts, unresolved
+    
+    def resolve_request(self, meeting_request: MeetingRequest) -> AttendeeResolution:
+        """Replace a request's attendee names with the email addresses they resolve to
+        
+        Unresolved names are dropped from the attendees and reported separately.
+        """
+        contacts, unresolved = self.resolve_many(meeting_request.attendees)
+        meeting = meeting_request.model_copy(update={
+            'attendees': [contact.email for contact in contacts]
+        })
+        return AttendeeResolution(meeting=meeting, contacts=contacts, unresolved=unresolved)
+    
+    def _lookup(self, name: str, key: str) -> Optional[Contact]:
+        """Find the contact for a normalized name without using the cache"""
+        if not key:
+            return None
+        
+        # Exact match on a name, alias or email
+        matches = self._index.get(key)
+        if matches:
+            return self._unique(matches)
+        
+        # Unknown email addresses are still valid attendees
+        if is_email(name):
+            return Contact(name=name.strip(), email=name.strip())
+        
+        # Unique prefix match, e.g. "Jo" for "Johnathan"
+        position = bisect.bisect_left(self._sorted_keys, key)
+        matches = []
+        while position < len(self._sorted_keys) and self._sorted_keys[position].startswith(key):
+            matches.extend(self._index[self._sorted_keys[position]])
+            position += 1
+        if matches:
+            return self._unique(matches)
+        
+        # Fuzzy match for typos, e.g. "Jonh" for "John"
+        close = difflib.get_close_matches(key, self._sorted_keys, n=2, cutoff=self.fuzzy_cutoff)
+        if close:
+            return self._unique([contact for match in close for contact in self._index[match]])
+        
+        return None
+    
+    def _index_contact(self, contact: Contact):
+        """Add a contact under all of its lookup keys"""
+        keys = {self._normalize(contact.name), self._normalize(contact.email),
+                self._normalize(contact.email.split('@')[0])}
+        keys.update(self._normalize(part) for part in contact.name.split())
+        keys.update(self._normalize(alias) for alias in contact.aliases)
+        for key in keys:
+            if key:
+                self._index.setdefault(key, []).append(contact)
+    
+    @staticmethod
+    def _unique(matches: List[Contact]) -> Optional[Contact]:
+        """Return the single contact among matches, or None if they differ"""
+        emails = {contact.email for contact in matches}
+        return matches[0] if len(emails) == 1 else None
+    
+    @staticmethod
+    def _normalize(name: str) -> str:
+        return ' '.join(name.lower().split())
+    
+    @staticmethod
+    def _contact_from_row(row: dict) -> Contact:
+        """Build a contact from a CSV or SQLite row"""
+        aliases = row.get('aliases') or ''
+        return Contact(
+            name=row['name'],
+            email=row['email'],
+            calendar_id=row.get('calendar_id') or None,
+            aliases=[alias.strip() for alias in aliases.split(';') if alias.strip()]
+        )
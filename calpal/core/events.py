@@ -0,0 +1,27 @@
+"""
+Agent events - Pluggable progress reporting for CalPal agents
+"""
+
+import logging
+from typing import Any, Callable, Dict, Optional
+
+
+# Called with an event name such as 'parse.completed' and its details
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+
+def ignore_event(name: str, data: Dict[str, Any]):
+    """Default callback: agents report nothing unless asked to"""
+    pass
+
+
+def logging_callback(logger: Optional[logging.Logger] = None,
+                     level: int = logging.DEBUG) -> EventCallback:
+    """Build a callback that forwards agent events to a logger"""
+    logger = logger or logging.getLogger('calpal')
+    
+    def log_event(name: str, data: Dict[str, Any]):
+        if logger.isEnabledFor(level):
+            logger.log(level, "%s %s", name, data)
+    
+    return log_event
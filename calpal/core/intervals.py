@@ -0,0 +1,94 @@
+"""
+Interval engine - Busy/free interval math shared by slot, room and booking searches
+
+Intervals are (start, end) datetime tuples. Functions that take "merged"
+intervals expect them sorted by start and non-overlapping, as returned by
+merge().
+"""
+
+import bisect
+from datetime import datetime, time, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+
+def merge(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort intervals and merge any that overlap or touch"""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def overlaps(merged: List[Interval], start: datetime, end: datetime) -> bool:
+    """Check whether [start, end) overlaps any merged interval"""
+    # Only the last interval starting before `end` can overlap
+    index = bisect.bisect_left(merged, (end,)) - 1
+    return index >= 0 and merged[index][1] > start
+
+
+def free_slots(merged: List[Interval], window_start: datetime, window_end: datetime,
+               duration: timedelta, step: timedelta,
+               limit: Optional[int] = None) -> List[Interval]:
+    """Find free slots of a given duration on a step grid anchored at window_start
+    
+    Runs in one pass over the busy intervals: when a candidate hits a busy
+    interval, the search jumps to the first grid point after it instead of
+    testing every step in between.
+    """
+    slots: List[Interval] = []
+    index = bisect.bisect_right(merged, (window_start,))
+    if index > 0 and merged[index - 1][1] > window_start:
+        index -= 1
+    
+    current = window_start
+    while current + duration <= window_end:
+        # Skip busy intervals that end before this candidate
+        while index < len(merged) and merged[index][1] <= current:
+            index += 1
+        
+        slot_end = current + duration
+        if index < len(merged) and merged[index][0] < slot_end:
+            # Jump to the first grid point at or after the end of the blocking interval
+            steps = -((current - merged[index][1]) // step)
+            current += steps * step
+            continue
+        
+        slots.append((current, slot_end))
+        if limit is not None and len(slots) >= limit:
+            break
+        current += step
+    
+    return slots
+
+
+def working_slots(merged: List[Interval], window_start: datetime, window_end: datetime,
+                  duration: timedelta, step: timedelta, work_start: time, work_end: time,
+                  limit: Optional[int] = None) -> List[Interval]:
+    """Find free slots within working hours on a step grid aligned to each day's work start
+    
+    With a 15-minute step and a 9:00 start, candidates are 9:00, 9:15, ...
+    whatever time the window itself starts at.
+    """
+    slots: List[Interval] = []
+    day = window_start.date()
+    while datetime.combine(day, work_start) < window_end:
+        day_start = datetime.combine(day, work_start)
+        day_end = min(datetime.combine(day, work_end), window_end)
+        if window_start > day_start:
+            # First grid point at or after the window start
+            day_start += -((day_start - window_start) // step) * step
+        
+        if day_start < day_end:
+            remaining = None if limit is None else limit - len(slots)
+            slots.extend(free_slots(merged, day_start, day_end, duration, step, remaining))
+            if limit is not None and len(slots) >= limit:
+                break
+        day += timedelta(days=1)
+    
+    return slots
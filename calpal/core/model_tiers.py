@@ -0,0 +1,63 @@
+"""
+Model Tiers - Per-model latency and accuracy tracking for the tiered parser
+"""
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class ModelTier:
+    """One LLM in the parser's escalation chain, with its running statistics
+    
+    Latencies of the last `window` calls are kept to estimate the p95 used
+    as the hedging timeout. Accuracy is the share of responses that passed
+    validation.
+    """
+    
+    def __init__(self, model: str, llm, window: int = 200, min_samples: int = 20):
+        self.model = model
+        self.llm = llm
+        self.min_samples = min_samples
+        self.calls = 0
+        self.valid = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies_ms: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, latency_ms: float, valid: bool):
+        """Record one completed call"""
+        with self._lock:
+            self.calls += 1
+            self.valid += valid
+            self._latencies_ms.append(latency_ms)
+    
+    def record_hedge(self, won: bool = False):
+        """Record a hedged request, or that a hedged request answered first"""
+        with self._lock:
+            if won:
+                self.hedge_wins += 1
+            else:
+                self.hedged += 1
+    
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency percentile in milliseconds, or None before min_samples calls"""
+        with self._lock:
+            if len(self._latencies_ms) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies_ms)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the tier's statistics"""
+        return {
+            'model': self.model,
+            'calls': self.calls,
+            'valid': self.valid,
+            'accuracy': self.valid / self.calls if self.calls else None,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+        }
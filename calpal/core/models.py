@@ -3,8 +3,9 @@ Data models for CalPal
 """
 
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from enum import Enum
 
 
 class MeetingRequest(BaseModel):
@@ -17,11 +18,29 @@ class MeetingRequest(BaseModel):
     description: Optional[str] = None
 
 
+class Room(BaseModel):
+    """Bookable room or other resource with its own calendar"""
+    name: str
+    calendar_id: str  # e.g. the room's resource calendar address
+    capacity: int = 0
+    attributes: List[str] = []  # e.g. ["projector", "video"]
+
+
+class Tenant(BaseModel):
+    """Account the service schedules on behalf of, with its own Google credentials"""
+    tenant_id: str
+    credentials_file: str
+    token_file: str
+    calendar_id: Optional[str] = None
+    requests_per_second: Optional[float] = None  # None uses the registry's default
+
+
 class TimeSlot(BaseModel):
     """Available time slot for meeting"""
     start_time: datetime
     end_time: datetime
     duration_minutes: int
+    room: Optional[Room] = None  # Set when the slot was found together with a free room
 
 
 class CalendarEvent(BaseModel):
@@ -34,4 +53,97 @@ class CalendarEvent(BaseModel):
     description: Optional[str] = None
 
 
+class BusyPeriod(BaseModel):
+    """Period during which a calendar is busy"""
+    start_time: datetime
+    end_time: datetime
+
+
+class SlotSearch(BaseModel):
+    """Result of searching a calendar window for free slots"""
+    window_start: datetime
+    window_end: datetime
+    busy: List[BusyPeriod]
+    slots: List[TimeSlot]
+
+
+class PlannedMeeting(BaseModel):
+    """Scheduling decision for one request, computed without writing to the calendar"""
+    request: str
+    meeting: Optional[MeetingRequest] = None
+    slot: Optional[TimeSlot] = None
+    alternatives: List[TimeSlot] = []
+    conflicts: List[BusyPeriod] = []  # Busy time between the window start and the chosen slot
+    attendee_calendar_ids: List[str] = []  # Resolved attendee calendars, re-checked on apply
+    timings_ms: Dict[str, float] = {}
+    error: Optional[str] = None
+
+
+class SchedulePlan(BaseModel):
+    """Serializable set of planned meetings that can be applied later"""
+    calendar_id: str
+    created_at: datetime
+    meetings: List[PlannedMeeting]
+
+
+class EventResult(BaseModel):
+    """Outcome of creating one calendar event"""
+    event: CalendarEvent
+    link: Optional[str] = None
+    error: Optional[str] = None
+    
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class ScheduleOutcome(str, Enum):
+    """How a scheduling request ended"""
+    SCHEDULED = "scheduled"
+    PARSE_FAILED = "parse_failed"
+    NO_SLOTS = "no_slots"
+    CANCELLED = "cancelled"
+    CONFLICT = "conflict"
+    FAILED = "failed"
+
+
+class StageError(BaseModel):
+    """Error raised by one stage of the scheduling workflow"""
+    stage: str  # 'parse', 'search', 'book'
+    message: str
+
+
+class ScheduleResult(BaseModel):
+    """Full outcome of a scheduling request"""
+    request: str
+    outcome: ScheduleOutcome
+    meeting: Optional[MeetingRequest] = None
+    slot: Optional[TimeSlot] = None
+    alternatives: List[TimeSlot] = []
+    event_link: Optional[str] = None
+    unresolved_attendees: List[str] = []  # Names the attendee directory could not resolve
+    errors: List[StageError] = []
+    timings_ms: Dict[str, float] = {}
+    
+    @property
+    def success(self) -> bool:
+        return self.outcome == ScheduleOutcome.SCHEDULED
+
+
+class Contact(BaseModel):
+    """Known attendee with the calendar used for their availability"""
+    name: str
+    email: str
+    calendar_id: Optional[str] = None  # Defaults to the email address
+    aliases: List[str] = []
+    
+    @property
+    def calendar(self) -> str:
+        return self.calendar_id or self.email
+
 
+class AttendeeResolution(BaseModel):
+    """Meeting request with attendee names resolved to email addresses"""
+    meeting: MeetingRequest
+    contacts: List[Contact]
+    unresolved: List[str] = []
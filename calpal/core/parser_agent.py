@@ -4,22 +4,60 @@ Parser Agent - Converts natural language to structured meeting data
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.prompts import ChatPromptTemplate
-import json
-import re
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 from .models import MeetingRequest
+from .model_tiers import ModelTier
+from .directory import AttendeeDirectory
+from .response_repair import ResponseRepairer
+from .events import EventCallback, ignore_event
+from .replay import InteractionSession
+from ..utils.extractor import extract
+from ..utils.json_stream import IncrementalJSONParser
 
 
 class ParserAgent:
-    """Agent responsible for parsing natural language meeting requests"""
-    
-    def __init__(self, google_api_key: str):
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-pro",
-            temperature=0,
-            google_api_key=google_api_key,
-            convert_system_message_to_human=True
-        )
+    """Agent responsible for parsing natural language meeting requests
+    
+    Models are tried as tiers, fastest first: a response that fails
+    validation escalates to the next model, and only when every tier fails
+    does parsing fall back to keyword extraction. Once a tier has enough
+    history, a call slower than its p95 latency is hedged with a second
+    identical request and the first valid answer wins. With a concurrency
+    limit, every LLM call, hedges included, holds one of `concurrency`
+    slots, and a call is only hedged when a slot is free.
+    """
+    
+    MODEL = "gemini-pro"
+    
+    def __init__(self, google_api_key: str, on_event: Optional[EventCallback] = None,
+                 session: Optional[InteractionSession] = None,
+                 models: Optional[List[str]] = None, hedge: bool = True,
+                 directory: Optional[AttendeeDirectory] = None,
+                 concurrency: Optional[int] = None, max_workers: int = 8):
+        self.on_event = on_event or ignore_event
+        # Fixes common response defects locally instead of escalating
+        self.repairer = ResponseRepairer(directory)
+        # Records or replays every LLM call when set
+        self.session = session
+        self.hedge = hedge
+        self.tiers = [
+            ModelTier(model, ChatGoogleGenerativeAI(
+                model=model,
+                temperature=0,
+                google_api_key=google_api_key,
+                convert_system_message_to_human=True
+            ))
+            for model in models or [self.MODEL]
+        ]
+        self.llm = self.tiers[0].llm
+        self._slots: Optional[threading.Semaphore] = None
+        self.limit_concurrency(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='calpal-llm')
         
         # Create the prompt template
         self.prompt = ChatPromptTemplate.from_messages([
@@ -46,72 +84,185 @@ Rules:
     
     def parse(self, natural_language: str) -> MeetingRequest:
         """Parse natural language into structured meeting request"""
+        return self._parse_tiers(natural_language, self.tiers)
+    
+    def limit_concurrency(self, limit: Optional[int]):
+        """Cap concurrent LLM calls, hedges included, at limit; None removes the cap"""
+        self._slots = threading.BoundedSemaphore(limit) if limit else None
+    
+    def close(self):
+        """Stop the hedging threads; calls still running finish in the background"""
+        self._executor.shutdown(wait=False)
+    
+    def tier_stats(self) -> List[Dict[str, Any]]:
+        """Latency, accuracy and hedging statistics for each model tier"""
+        return [tier.stats() for tier in self.tiers]
+    
+    def parse_stream(self, natural_language: str,
+                     on_field: Optional[Callable[[str, Any], None]] = None) -> MeetingRequest:
+        """Parse natural language while the LLM response streams in
+        
+        Each field is passed to on_field, and emitted as a 'parse.field'
+        event, as soon as its value is complete, so callers can start work
+        such as a freebusy prefetch before the response ends. The stream is
+        abandoned once the JSON object closes. The streamed call counts as
+        the first tier's attempt; a response that cannot be repaired
+        escalates to the remaining tiers before the fallback parser.
+        """
+        tier = self.tiers[0]
+        started = time.perf_counter()
         try:
-            # Create the chain
-            chain = self.prompt | self.llm
-            
-            # Get response from LLM
-            response = chain.invoke({"input": natural_language})
-            
-            # Extract JSON from response
-            json_str = self._extract_json(response.content)
-            
-            # Parse JSON and create MeetingRequest
-            data = json.loads(json_str)
-            return MeetingRequest(**data)
-            
+            with self._slot():
+                meeting = self._read_stream(natural_language, on_field)
         except Exception as e:
-            print(f"LLM parsing failed: {e}")
-            # Fallback to simple parsing
-            return self._fallback_parse(natural_language)
-    
-    def _extract_json(self, text: str) -> str:
-        """Extract JSON from LLM response"""
-        # Look for JSON in the response
-        json_match = re.search(r'\{.*\}', text, re.DOTALL)
-        if json_match:
-            return json_match.group()
-        else:
-            # If no JSON found, try to clean up the response
-            cleaned = text.strip()
-            if cleaned.startswith('```json'):
-                cleaned = cleaned[7:]
-            if cleaned.endswith('```'):
-                cleaned = cleaned[:-3]
-            return cleaned.strip()
+            tier.record((time.perf_counter() - started) * 1000, valid=False)
+            self.on_event('parse.escalated', {'model': tier.model, 'error': str(e), 'streamed': True})
+            return self._parse_tiers(natural_language, self.tiers[1:], e)
+        tier.record((time.perf_counter() - started) * 1000, valid=True)
+        return meeting
     
-    def _fallback_parse(self, natural_language: str) -> MeetingRequest:
-        """Fallback parsing when LLM parsing fails"""
-        # Simple keyword extraction as fallback
-        attendees = []
-        topic = "Meeting"
-        duration_minutes = 60  # Default 1 hour
-        time_constraint = natural_language
+    def _parse_tiers(self, natural_language: str, tiers: List[ModelTier],
+                     error: Optional[Exception] = None) -> MeetingRequest:
+        """Try each tier in turn, falling back to keyword extraction when all fail"""
+        for tier in tiers:
+            try:
+                return self._parse_with_tier(tier, natural_language)
+            except Exception as e:
+                error = e
+                self.on_event('parse.escalated', {'model': tier.model, 'error': str(e)})
+        
+        self.on_event('parse.fallback', {'error': str(error)})
+        # Fallback to simple parsing
+        return self._fallback_parse(natural_language)
+    
+    def _read_stream(self, natural_language: str,
+                     on_field: Optional[Callable[[str, Any], None]]) -> MeetingRequest:
+        """Stream the first tier's response, reporting fields as they complete"""
+        parser = IncrementalJSONParser()
+        stream = self._stream(natural_language)
+        for chunk in stream:
+            try:
+                fields = parser.feed(chunk)
+            except ValueError:
+                # Malformed JSON such as single quotes: read the rest and repair it whole
+                return self.repairer.repair(parser.buffer + ''.join(stream))
+            for name, value in fields.items():
+                self.on_event('parse.field', {'name': name, 'value': value})
+                if on_field is not None:
+                    on_field(name, value)
+            if parser.done:
+                break
+        
+        if not parser.done:
+            raise ValueError("LLM response ended before the JSON object closed")
+        return self.repairer.repair_fields(parser.fields)
+    
+    def _stream(self, natural_language: str) -> Iterator[str]:
+        """Yield the LLM response text as it arrives"""
+        # Recorded sessions hold whole responses, so they are replayed as one chunk
+        if self.session is not None:
+            yield self._complete(natural_language)
+            return
         
-        # Extract attendees (simple pattern matching)
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, natural_language)
-        attendees.extend(emails)
+        chain = self.prompt | self.llm
+        for chunk in chain.stream({"input": natural_language}):
+            yield chunk.content
+    
+    def _parse_with_tier(self, tier: ModelTier, natural_language: str) -> MeetingRequest:
+        """Parse with one model, hedging calls that run past its p95 latency"""
+        hedge_after_ms = tier.percentile(0.95) if self.hedge else None
+        if hedge_after_ms is None:
+            with self._slot():
+                return self._attempt(tier, natural_language)
         
-        # Extract names (simple heuristic)
-        name_pattern = r'\b[A-Z][a-z]+\b'
-        names = re.findall(name_pattern, natural_language)
-        attendees.extend([name for name in names if name not in ['Meeting', 'Lunch', 'Dinner', 'Call', 'Call']])
+        # The hedge timer starts once the call holds a slot, not while it waits for one
+        started = threading.Event()
+        futures = [self._executor.submit(self._limited_attempt, tier, natural_language, started)]
+        started.wait()
+        done, _ = wait(futures, timeout=hedge_after_ms / 1000)
+        # Hedge only with a free slot, so hedges never queue behind other requests
+        slots = self._slots
+        if not done and (slots is None or slots.acquire(blocking=False)):
+            tier.record_hedge()
+            self.on_event('parse.hedged', {'model': tier.model, 'after_ms': hedge_after_ms})
+            futures.append(self._executor.submit(self._hedged_attempt, slots, tier, natural_language))
         
-        # Extract duration
-        duration_pattern = r'(\d+)\s*(hour|hr|minute|min)'
-        duration_match = re.search(duration_pattern, natural_language, re.IGNORECASE)
-        if duration_match:
-            value = int(duration_match.group(1))
-            unit = duration_match.group(2).lower()
-            if unit in ['hour', 'hr']:
-                duration_minutes = value * 60
-            else:
-                duration_minutes = value
+        # The slower request is left to finish in the background
+        error = None
+        for future in as_completed(futures):
+            try:
+                meeting = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if future is not futures[0]:
+                tier.record_hedge(won=True)
+            return meeting
+        raise error
+    
+    def _slot(self):
+        """Context manager holding one concurrency slot, or nothing without a limit"""
+        return self._slots if self._slots is not None else contextlib.nullcontext()
+    
+    def _limited_attempt(self, tier: ModelTier, natural_language: str,
+                         started: threading.Event) -> MeetingRequest:
+        """Wait for a concurrency slot, then make one attempt while holding it"""
+        with self._slot():
+            started.set()
+            return self._attempt(tier, natural_language)
+    
+    def _hedged_attempt(self, slots: Optional[threading.Semaphore], tier: ModelTier,
+                        natural_language: str) -> MeetingRequest:
+        """Make one attempt with a slot the caller already took, releasing it after"""
+        try:
+            return self._attempt(tier, natural_language)
+        finally:
+            if slots is not None:
+                slots.release()
+    
+    def _attempt(self, tier: ModelTier, natural_language: str) -> MeetingRequest:
+        """Call one model once and validate its response, recording the outcome"""
+        started = time.perf_counter()
+        try:
+            content = self._complete(natural_language, tier)
+        except Exception:
+            tier.record((time.perf_counter() - started) * 1000, valid=False)
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        
+        try:
+            meeting = self._validate(content)
+        except Exception:
+            tier.record(latency_ms, valid=False)
+            raise
+        tier.record(latency_ms, valid=True)
+        return meeting
+    
+    def _validate(self, content: str) -> MeetingRequest:
+        """Turn an LLM response into a MeetingRequest, raising if it cannot be repaired"""
+        return self.repairer.repair(content)
+    
+    def _complete(self, natural_language: str, tier: Optional[ModelTier] = None) -> str:
+        """Run the prompt through a model tier's LLM and return the response text"""
+        tier = tier or self.tiers[0]
+        # Create the chain
+        chain = self.prompt | tier.llm
+        
+        def send():
+            return chain.invoke({"input": natural_language}).content
+        
+        if self.session is None:
+            return send()
+        return self.session.call(f'llm:{tier.model}', natural_language, send)
+    
+    def _fallback_parse(self, natural_language: str) -> MeetingRequest:
+        """Fallback parsing when LLM parsing fails"""
+        # Simple keyword extraction as fallback, in a single scan of the text
+        extraction = extract(natural_language)
         
         return MeetingRequest(
-            attendees=attendees,
-            topic=topic,
-            duration_minutes=duration_minutes,
-            time_constraint=time_constraint
+            attendees=extraction.emails + extraction.names,
+            topic="Meeting",
+            duration_minutes=extraction.durations[0] if extraction.durations else 60,  # Default 1 hour
+            time_constraint=natural_language
         )
@@ -0,0 +1,198 @@
+"""
+Planner Agent - Computes schedule plans without writing, and applies them later
+"""
+
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from googleapiclient.errors import HttpError
+
+from . import intervals
+from .models import (
+    BusyPeriod, CalendarEvent, PlannedMeeting, SchedulePlan,
+    ScheduleResult, ScheduleOutcome, StageError
+)
+from .parser_agent import ParserAgent
+from .calendar_agent import CalendarAgent
+from .events import EventCallback, ignore_event
+from .directory import AttendeeDirectory
+
+
+class PlannerAgent:
+    """Agent that plans meetings as a dry run and commits plans in one batched write
+    
+    The parser agent is only needed for planning; applying a plan uses the
+    calendar agent alone.
+    """
+    
+    def __init__(self, parser_agent: Optional[ParserAgent], calendar_agent: CalendarAgent,
+                 on_event: Optional[EventCallback] = None,
+                 directory: Optional[AttendeeDirectory] = None):
+        self.parser_agent = parser_agent
+        self.calendar_agent = calendar_agent
+        self.directory = directory
+        self.on_event = on_event or ignore_event
+    
+    def plan(self, natural_language_requests: List[str]) -> SchedulePlan:
+        """Parse, search and rank slots for each request without creating any events
+        
+        Requests are planned in order, and each chosen slot is treated as busy
+        for the requests after it so a plan never double-books itself.
+        """
+        planned_busy: List[BusyPeriod] = []
+        meetings = []
+        
+        for request in natural_language_requests:
+            planned = self._plan_one(request, planned_busy)
+            if planned.slot:
+                planned_busy.append(BusyPeriod(start_time=planned.slot.start_time,
+                                               end_time=planned.slot.end_time))
+            meetings.append(planned)
+            self.on_event('request.planned', {'planned': planned})
+        
+        return SchedulePlan(
+            calendar_id=self.calendar_agent.calendar_id,
+            created_at=datetime.now(),
+            meetings=meetings
+        )
+    
+    def apply(self, plan: SchedulePlan) -> List[ScheduleResult]:
+        """Create the planned events with one batched write
+        
+        All planned slots are re-checked with a single freebusy query first,
+        covering our calendar and every meeting's attendee calendars; a
+        meeting whose slot was taken since planning moves to its first
+        alternative that is still free for it. Returns one result per meeting.
+        """
+        results = []
+        for meeting in plan.meetings:
+            result = ScheduleResult(request=meeting.request, outcome=ScheduleOutcome.FAILED,
+                                    meeting=meeting.meeting, slot=meeting.slot,
+                                    alternatives=meeting.alternatives)
+            if meeting.error:
+                result.outcome = (ScheduleOutcome.NO_SLOTS if meeting.meeting
+                                  else ScheduleOutcome.PARSE_FAILED)
+                result.errors.append(StageError(stage='plan', message=meeting.error))
+            results.append(result)
+        
+        scheduled = [(index, meeting) for index, meeting in enumerate(plan.meetings) if meeting.slot]
+        if not scheduled:
+            return results
+        
+        slots = [slot for _, meeting in scheduled for slot in [meeting.slot] + meeting.alternatives]
+        started = time.perf_counter()
+        calendar_id = self.calendar_agent.calendar_id
+        attendee_ids = [attendee_id for _, meeting in scheduled
+                        for attendee_id in meeting.attendee_calendar_ids]
+        try:
+            busy_by_calendar = self.calendar_agent.get_busy_times_by_calendar(
+                [calendar_id] + attendee_ids,
+                min(slot.start_time for slot in slots),
+                max(slot.end_time for slot in slots),
+                max_age=0
+            )
+        except HttpError as error:
+            for index, _ in scheduled:
+                results[index].errors.append(StageError(stage='verify', message=str(error)))
+            return results
+        verify_ms = (time.perf_counter() - started) * 1000
+        busy_times = intervals.merge(busy_by_calendar.get(calendar_id, []))
+        
+        indexes = []
+        events = []
+        for index, meeting in scheduled:
+            results[index].timings_ms['verify'] = verify_ms
+            meeting_busy = intervals.merge(busy_times + [
+                period for attendee_id in meeting.attendee_calendar_ids
+                for period in busy_by_calendar.get(attendee_id, [])
+            ])
+            slot = next((candidate for candidate in [meeting.slot] + meeting.alternatives
+                         if not intervals.overlaps(meeting_busy, candidate.start_time, candidate.end_time)),
+                        None)
+            if slot is None:
+                results[index].outcome = ScheduleOutcome.CONFLICT
+                results[index].errors.append(StageError(
+                    stage='verify', message="No planned slot is still free"))
+                continue
+            
+            busy_times = intervals.merge(busy_times + [(slot.start_time, slot.end_time)])
+            results[index].slot = slot
+            results[index].alternatives = [candidate for candidate in [meeting.slot] + meeting.alternatives
+                                           if candidate is not slot]
+            indexes.append(index)
+            events.append(CalendarEvent(
+                summary=meeting.meeting.topic,
+                start_time=slot.start_time,
+                end_time=slot.end_time,
+                attendees=meeting.meeting.attendees,
+                location=meeting.meeting.location,
+                description=meeting.meeting.description
+            ))
+        
+        started = time.perf_counter()
+        event_results = self.calendar_agent.create_events(events)
+        book_ms = (time.perf_counter() - started) * 1000
+        
+        for index, event_result in zip(indexes, event_results):
+            results[index].timings_ms['book'] = book_ms
+            if event_result.success:
+                results[index].outcome = ScheduleOutcome.SCHEDULED
+                results[index].event_link = event_result.link
+            else:
+                results[index].errors.append(StageError(stage='book', message=event_result.error))
+        
+        self.on_event('plan.applied', {'created': sum(result.success for result in results),
+                                       'total': len(results)})
+        return results
+    
+    def _plan_one(self, request: str, planned_busy: List[BusyPeriod]) -> PlannedMeeting:
+        """Plan a single request against the calendar and earlier planned meetings"""
+        planned = PlannedMeeting(request=request)
+        
+        started = time.perf_counter()
+        try:
+            planned.meeting = self.parser_agent.parse(request)
+        except Exception as e:
+            planned.error = f"Failed to parse meeting request: {e}"
+            return planned
+        finally:
+            planned.timings_ms['parse'] = (time.perf_counter() - started) * 1000
+        
+        attendee_calendar_ids = None
+        if self.directory is not None:
+            resolution = self.directory.resolve_request(planned.meeting)
+            planned.meeting = resolution.meeting
+            attendee_calendar_ids = [contact.calendar for contact in resolution.contacts]
+            planned.attendee_calendar_ids = attendee_calendar_ids
+        
+        started = time.perf_counter()
+        try:
+            search = self.calendar_agent.search_slots(
+                duration_minutes=planned.meeting.duration_minutes,
+                time_constraint=planned.meeting.time_constraint,
+                extra_busy=planned_busy,
+                attendee_calendar_ids=attendee_calendar_ids
+            )
+        except Exception as e:
+            planned.error = f"Failed to find available slots: {e}"
+            return planned
+        finally:
+            planned.timings_ms['search'] = (time.perf_counter() - started) * 1000
+        
+        if not search.slots:
+            planned.error = "No available time slots found"
+            planned.conflicts = search.busy
+            return planned
+        
+        planned.slot = search.slots[0]
+        planned.alternatives = search.slots[1:]
+        # The busy time passed over: busy periods between the window start and the chosen slot
+        chosen = planned.slot.start_time
+        planned.conflicts = [
+            BusyPeriod(start_time=max(period.start_time, search.window_start),
+                       end_time=min(period.end_time, chosen))
+            for period in search.busy
+            if period.start_time < chosen and period.end_time > search.window_start
+        ]
+        return planned
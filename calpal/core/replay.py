@@ -0,0 +1,242 @@
+"""
+Record/Replay - Captures LLM and Calendar API interactions and serves them back offline
+"""
+
+import gzip
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from ..exceptions.calpal_exceptions import ReplayError
+
+
+def _open(path: str, mode: str):
+    """Open a recording, gzip-compressed when the path ends with .gz"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class InteractionSession(ABC):
+    """Base for recorders and replayers
+    
+    Every interaction is identified by an operation, e.g. 'llm:gemini-pro' or
+    'calendar:freebusy.query', and a key built from its inputs.
+    """
+    
+    # Whether live services are needed; replayers run fully offline
+    offline = False
+    
+    @abstractmethod
+    def call(self, operation: str, key: str, send: Callable[[], Any]) -> Any:
+        """Run one interaction, returning its JSON-serializable response"""
+    
+    def wrap_service(self, service):
+        """Wrap a googleapiclient Calendar service so its requests go through this session"""
+        return _ServiceProxy(self, service, [])
+    
+    def close(self):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class Recorder(InteractionSession):
+    """Records live interactions, with their latency, to a JSON Lines file
+    
+    One line per interaction: {"op", "key", "ms", and "response" or "error"}.
+    A path ending in .gz is gzip-compressed.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = _open(path, 'w')
+        self._lock = threading.Lock()
+    
+    def call(self, operation: str, key: str, send: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            response = send()
+        except HttpError as error:
+            self.record(operation, key, (time.perf_counter() - started) * 1000,
+                        error={'status': error.resp.status, 'content': error.content.decode('utf-8', 'replace')})
+            raise
+        except Exception as error:
+            self.record(operation, key, (time.perf_counter() - started) * 1000,
+                        error={'message': str(error)})
+            raise
+        self.record(operation, key, (time.perf_counter() - started) * 1000, response=response)
+        return response
+    
+    def record(self, operation: str, key: str, elapsed_ms: float,
+               response: Any = None, error: Optional[Dict[str, Any]] = None):
+        """Append one interaction to the recording"""
+        entry = {'op': operation, 'key': key, 'ms': round(elapsed_ms, 1)}
+        if error is not None:
+            entry['error'] = error
+        else:
+            entry['response'] = response
+        line = json.dumps(entry, separators=(',', ':'), default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+    
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Replayer(InteractionSession):
+    """Serves recorded interactions instead of calling live services
+    
+    A call is answered by the next unused recording with the same operation
+    and key. When there is none, e.g. because a query embeds the current
+    time, the next unused recording of the same operation is served, so
+    replaying the same traffic in order reproduces it. Recorded latency is
+    replayed scaled by latency_scale, plus added_latency_ms.
+    Raises ReplayError when an operation has no recordings left.
+    """
+    
+    offline = True
+    
+    def __init__(self, path: str, latency_scale: float = 0.0, added_latency_ms: float = 0.0):
+        self.path = path
+        self.latency_scale = latency_scale
+        self.added_latency_ms = added_latency_ms
+        self._by_key: Dict[tuple, Deque[dict]] = defaultdict(deque)
+        self._by_operation: Dict[str, Deque[dict]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        
+        with _open(path, 'r') as recording:
+            for line in recording:
+                if line.strip():
+                    entry = json.loads(line)
+                    entry['used'] = False
+                    self._by_key[(entry['op'], entry['key'])].append(entry)
+                    self._by_operation[entry['op']].append(entry)
+    
+    def call(self, operation: str, key: str, send: Callable[[], Any]) -> Any:
+        entry = self._next(operation, key)
+        delay_ms = entry['ms'] * self.latency_scale + self.added_latency_ms
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+        
+        error = entry.get('error')
+        if error is None:
+            return entry['response']
+        if 'status' in error:
+            raise HttpError(httplib2.Response({'status': error['status']}), error['content'].encode('utf-8'))
+        raise ReplayError(f"Recorded {operation} failure: {error['message']}")
+    
+    def _next(self, operation: str, key: str) -> dict:
+        """Take the next unused recording for an interaction"""
+        with self._lock:
+            for queue in (self._by_key[(operation, key)], self._by_operation[operation]):
+                while queue:
+                    entry = queue.popleft()
+                    if not entry['used']:
+                        entry['used'] = True
+                        return entry
+        raise ReplayError(f"No recorded interaction left for {operation}")
+
+
+class _ServiceProxy:
+    """Stands in for a googleapiclient resource, building up the method path
+    
+    service.freebusy().query(body=...) becomes a request for the operation
+    'calendar:freebusy.query', keyed by its arguments.
+    """
+    
+    def __init__(self, session: InteractionSession, target, path: List[str]):
+        self._session = session
+        self._target = target
+        self._path = path
+    
+    def new_batch_http_request(self, callback=None):
+        return _BatchProxy(self._session, self._target, callback)
+    
+    def __getattr__(self, name):
+        def method(**kwargs):
+            target = getattr(self._target, name)(**kwargs) if self._target is not None else None
+            path = self._path + [name]
+            if name in _RESOURCE_METHODS:
+                return _ServiceProxy(self._session, target, path)
+            return _RequestProxy(self._session, target, 'calendar:' + '.'.join(path),
+                                 json.dumps(kwargs, sort_keys=True, default=str))
+        return method
+
+
+# Methods that return a resource rather than a request
+_RESOURCE_METHODS = frozenset({'events', 'freebusy', 'calendars', 'calendarList'})
+
+
+class _RequestProxy:
+    """Stands in for a googleapiclient HttpRequest"""
+    
+    def __init__(self, session: InteractionSession, target, operation: str, key: str):
+        self.session = session
+        self.target = target
+        self.operation = operation
+        self.key = key
+    
+    def execute(self):
+        return self.session.call(self.operation, self.key, lambda: self.target.execute())
+
+
+class _BatchProxy:
+    """Stands in for a batch request, recording or replaying each request in it"""
+    
+    def __init__(self, session: InteractionSession, service, callback):
+        self._session = session
+        self._service = service
+        self._callback = callback
+        self._requests: List[tuple] = []
+    
+    def add(self, request: _RequestProxy, callback=None, request_id=None):
+        request_id = request_id if request_id is not None else str(len(self._requests) + 1)
+        self._requests.append((request_id, request, callback or self._callback))
+    
+    def execute(self):
+        if self._session.offline:
+            for request_id, request, callback in self._requests:
+                try:
+                    response, exception = request.execute(), None
+                except HttpError as error:
+                    response, exception = None, error
+                callback(request_id, response, exception)
+            return
+        
+        # Send the real batch and record each response with the batch's latency
+        results = {}
+        
+        def on_response(request_id, response, exception):
+            results[request_id] = (response, exception)
+        
+        batch = self._service.new_batch_http_request(callback=on_response)
+        for request_id, request, _ in self._requests:
+            batch.add(request.target, request_id=request_id)
+        started = time.perf_counter()
+        batch.execute()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        for request_id, request, callback in self._requests:
+            response, exception = results.get(request_id, (None, None))
+            if isinstance(self._session, Recorder):
+                if isinstance(exception, HttpError):
+                    self._session.record(request.operation, request.key, elapsed_ms, error={
+                        'status': exception.resp.status,
+                        'content': exception.content.decode('utf-8', 'replace')
+                    })
+                elif exception is None:
+                    self._session.record(request.operation, request.key, elapsed_ms, response=response)
+            callback(request_id, response, exception)
@@ -0,0 +1,245 @@
+"""
+Response Repair - Validates LLM parser output and fixes common defects locally
+"""
+
+import json
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .models import MeetingRequest
+from .directory import AttendeeDirectory
+from ..utils.helpers import is_email
+
+
+_FENCE_RE = re.compile(r'```(?:json|JSON)?\s*(.*?)(?:```|$)', re.DOTALL)
+_LITERALS_RE = re.compile(r'\b(True|False|None)\b')
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+_DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(hours?|hrs?|h|minutes?|mins?|m)\b', re.IGNORECASE)
+_NAMED_EMAIL_RE = re.compile(r'[<(]\s*([^<>()\s]+@[^<>()\s]+)\s*[>)]')
+_ATTENDEE_SPLIT_RE = re.compile(r'\s*(?:,|;|\band\b)\s*')
+_JSON_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+
+class ResponseRepairer:
+    """Turns raw LLM responses into MeetingRequests, repairing what it safely can
+    
+    Repairs, each counted in metrics():
+    - code_fence: the JSON is wrapped in a ``` fence
+    - surrounding_text: prose before or after the JSON object
+    - json_syntax: single quotes, Python literals or trailing commas
+    - duration: durations given as text, e.g. "1 hour" or "90 mins"
+    - attendees: attendees given as one string, as objects, as
+      "Name <email>", or as names the directory resolves to emails
+    Anything still invalid after repair raises, so the caller can escalate.
+    """
+    
+    def __init__(self, directory: Optional[AttendeeDirectory] = None):
+        self.directory = directory
+        self._counts: Counter = Counter()
+        self._repairs: Counter = Counter()
+        self._lock = threading.Lock()
+    
+    def repair(self, content: str) -> MeetingRequest:
+        """Validate a raw response, repairing it first if needed"""
+        applied: List[str] = []
+        try:
+            meeting = self._repair_fields(self._load(content, applied), applied)
+        except Exception:
+            self._record('failed', applied)
+            raise
+        self._record('repaired' if applied else 'valid', applied)
+        return meeting
+    
+    def repair_fields(self, data: Any) -> MeetingRequest:
+        """Validate already-parsed fields, e.g. from a streamed response"""
+        applied: List[str] = []
+        try:
+            meeting = self._repair_fields(data, applied)
+        except Exception:
+            self._record('failed', applied)
+            raise
+        self._record('repaired' if applied else 'valid', applied)
+        return meeting
+    
+    def _repair_fields(self, data: Any, applied: List[str]) -> MeetingRequest:
+        """Build a MeetingRequest from parsed fields, repairing durations and attendees"""
+        if not isinstance(data, dict):
+            raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+        data = dict(data)
+        
+        if 'duration_minutes' not in data and 'duration' in data:
+            data['duration_minutes'] = data.pop('duration')
+        duration = data.get('duration_minutes')
+        if isinstance(duration, str) and not duration.strip().isdigit():
+            data['duration_minutes'] = self._parse_duration(duration)
+            applied.append('duration')
+        elif isinstance(duration, float):
+            data['duration_minutes'] = round(duration)
+            applied.append('duration')
+        
+        if 'attendees' in data:
+            attendees = self._repair_attendees(data['attendees'])
+            if attendees != data['attendees']:
+                data['attendees'] = attendees
+                applied.append('attendees')
+        
+        return MeetingRequest(**data)
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Counts of responses that were valid, repaired or unrepairable, and of each repair"""
+        with self._lock:
+            return {
+                'responses': sum(self._counts.values()),
+                'valid': self._counts['valid'],
+                'repaired': self._counts['repaired'],
+                'failed': self._counts['failed'],
+                'repairs': dict(self._repairs),
+            }
+    
+    def _record(self, outcome: str, applied: List[str]):
+        with self._lock:
+            self._counts[outcome] += 1
+            self._repairs.update(applied)
+    
+    def _load(self, content: str, applied: List[str]) -> Any:
+        """Parse the JSON in a response, repairing its text as needed"""
+        text = content.strip()
+        fence = _FENCE_RE.search(text)
+        if fence:
+            text = fence.group(1).strip()
+            applied.append('code_fence')
+        
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+        
+        candidate = _first_object(text)
+        if candidate != text:
+            applied.append('surrounding_text')
+            try:
+                return json.loads(candidate)
+            except ValueError:
+                pass
+        
+        applied.append('json_syntax')
+        return json.loads(_to_json(candidate))
+    
+    def _repair_attendees(self, attendees: Any) -> Any:
+        """Normalize attendees to a list of emails, or names where no email is known"""
+        if isinstance(attendees, str):
+            attendees = [part for part in _ATTENDEE_SPLIT_RE.split(attendees) if part]
+        if not isinstance(attendees, list):
+            return attendees
+        
+        repaired = []
+        for attendee in attendees:
+            if isinstance(attendee, dict):
+                attendee = attendee.get('email') or attendee.get('name') or ''
+            attendee = str(attendee).strip()
+            named = _NAMED_EMAIL_RE.search(attendee)
+            if named:
+                attendee = named.group(1)
+            elif not is_email(attendee) and self.directory is not None:
+                contact = self.directory.resolve(attendee)
+                if contact is not None:
+                    attendee = contact.email
+            if attendee:
+                repaired.append(attendee)
+        return repaired
+    
+    @staticmethod
+    def _parse_duration(text: str) -> int:
+        """Convert e.g. "1 hour", "1.5 hrs" or "1 hour 30 minutes" to minutes"""
+        matches = _DURATION_RE.findall(text)
+        if not matches:
+            raise ValueError(f"Unrecognized duration: {text!r}")
+        minutes = 0.0
+        for amount, unit in matches:
+            minutes += float(amount) * (60 if unit.lower().startswith('h') else 1)
+        return round(minutes)
+
+
+def _first_object(text: str) -> str:
+    """The first balanced {...} in text, honoring single- and double-quoted strings"""
+    start = text.find('{')
+    if start < 0:
+        return text
+    
+    depth = 0
+    quote = None
+    escaped = False
+    for position in range(start, len(text)):
+        char = text[position]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == quote and _closes_string(text, position, quote):
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:position + 1]
+    return text[start:]
+
+
+def _to_json(text: str) -> str:
+    """Rewrite Python-style object text as JSON
+    
+    Single-quoted strings become double-quoted, True/False/None become JSON
+    literals and trailing commas are dropped.
+    """
+    output = []
+    outside = []
+    quote = None
+    escaped = False
+    
+    def flush_outside():
+        segment = _LITERALS_RE.sub(lambda match: _JSON_LITERALS[match.group()], ''.join(outside))
+        output.append(segment)
+        outside.clear()
+    
+    for position, char in enumerate(text):
+        if quote is None:
+            if char in '"\'':
+                flush_outside()
+                quote = char
+                output.append('"')
+            else:
+                outside.append(char)
+        elif escaped:
+            escaped = False
+            # \' is not a valid JSON escape
+            output.append(char if char == "'" else '\\' + char)
+        elif char == '\\':
+            escaped = True
+        elif char == quote and _closes_string(text, position, quote):
+            quote = None
+            output.append('"')
+        elif char == '"':
+            output.append('\\"')
+        else:
+            output.append(char)
+    flush_outside()
+    
+    return _TRAILING_COMMA_RE.sub(r'\1', ''.join(output))
+
+
+def _closes_string(text: str, position: int, quote: str) -> bool:
+    """Whether the quote at position ends its string
+    
+    A single quote only ends a string when followed by JSON punctuation, so
+    apostrophes such as in 'John's sync' stay part of the string.
+    """
+    if quote == '"':
+        return True
+    following = text[position + 1:].lstrip()
+    return not following or following[0] in ',:}]'
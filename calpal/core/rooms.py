@@ -0,0 +1,136 @@
+"""
+Room Agent - Finds a free room and time together across many room calendars
+"""
+
+import json
+from datetime import time as dt_time, timedelta
+from typing import Iterable, List, Optional
+
+from googleapiclient.errors import HttpError
+
+from . import intervals
+from .models import MeetingRequest, Room, TimeSlot
+from .calendar_agent import CalendarAgent
+from .events import EventCallback, ignore_event
+from ..exceptions.calpal_exceptions import CalendarError, ConfigurationError
+
+
+class RoomAgent:
+    """Agent that searches attendee and room availability jointly
+    
+    Busy times for the organizer, attendees and every candidate room come
+    from one batched freebusy round trip. Free slots are then computed per
+    room against the attendees' merged busy intervals, so adding rooms
+    costs interval math rather than API calls.
+    """
+    
+    def __init__(self, calendar_agent: CalendarAgent, rooms: Iterable[Room],
+                 on_event: Optional[EventCallback] = None):
+        self.calendar_agent = calendar_agent
+        self.rooms = list(rooms)
+        self.on_event = on_event or ignore_event
+    
+    @classmethod
+    def from_file(cls, calendar_agent: CalendarAgent, path: str,
+                  on_event: Optional[EventCallback] = None) -> 'RoomAgent':
+        """Load rooms from a JSON file holding a list of rooms or {"rooms": [...]}"""
+        with open(path, encoding='utf-8') as rooms_file:
+            config = json.load(rooms_file)
+        
+        if isinstance(config, dict):
+            config = config.get('rooms', [])
+        if not isinstance(config, list):
+            raise ConfigurationError(f"Rooms file must contain a list of rooms: {path}")
+        
+        return cls(calendar_agent, (Room(**room) for room in config), on_event)
+    
+    def candidate_rooms(self, attendee_count: int, required_attributes: Iterable[str] = (),
+                        location: Optional[str] = None) -> List[Room]:
+        """Rooms that fit the meeting, smallest first
+        
+        A location naming a configured room restricts the search to that room.
+        Rooms with capacity 0 are treated as having unknown capacity.
+        """
+        if location:
+            named = [room for room in self.rooms if room.name.lower() == location.strip().lower()]
+            if named:
+                return named
+        
+        required = {attribute.lower() for attribute in required_attributes}
+        rooms = [
+            room for room in self.rooms
+            if (room.capacity == 0 or room.capacity >= attendee_count)
+            and required <= {attribute.lower() for attribute in room.attributes}
+        ]
+        return sorted(rooms, key=lambda room: room.capacity or float('inf'))
+    
+    def find_available_slots(self, meeting_request: MeetingRequest,
+                             attendee_calendar_ids: Optional[List[str]] = None,
+                             required_attributes: Iterable[str] = (),
+                             days_ahead: Optional[int] = None, max_slots: int = 5) -> List[TimeSlot]:
+        """Find the best room/time pairs for a meeting
+        
+        Slots are ranked by start time, then by how tightly the room fits,
+        with at most one room per start time. Candidates follow the calendar
+        agent's step_minutes grid and work_hours, and without days_ahead the
+        horizon widens from one day up to max_days_ahead, as in
+        CalendarAgent.search_slots. Rooms whose calendar cannot be read are
+        dropped, with a 'rooms.unreadable' event, rather than offered as free.
+        """
+        rooms = self.candidate_rooms(len(meeting_request.attendees) + 1, required_attributes,
+                                     meeting_request.location)
+        if not rooms:
+            return []
+        
+        agent = self.calendar_agent
+        max_days = days_ahead or agent.max_days_ahead
+        horizon = days_ahead or 1
+        start_time, _ = agent.get_search_window(meeting_request.time_constraint, max_days)
+        people = [agent.calendar_id] + list(attendee_calendar_ids or [])
+        calendar_ids = list(dict.fromkeys(people + [room.calendar_id for room in rooms]))
+        duration = timedelta(minutes=meeting_request.duration_minutes)
+        step = timedelta(minutes=agent.step_minutes)
+        work_start, work_end = (dt_time(hour) for hour in agent.work_hours)
+        
+        busy_by_calendar = {calendar_id: [] for calendar_id in calendar_ids}
+        fetched_until = start_time
+        while True:
+            end_time = start_time + timedelta(days=horizon)
+            try:
+                fetched = agent.get_busy_times_by_calendar(calendar_ids, fetched_until, end_time)
+            except HttpError as error:
+                raise CalendarError(f"Failed to query room availability: {error}") from error
+            for calendar_id, busy in fetched.items():
+                busy_by_calendar[calendar_id].extend(busy)
+            fetched_until = end_time
+            
+            unreadable = [room for room in rooms if room.calendar_id in fetched.errors]
+            if unreadable:
+                self.on_event('rooms.unreadable', {
+                    'rooms': [room.name for room in unreadable],
+                    'errors': {room.calendar_id: fetched.errors[room.calendar_id] for room in unreadable}
+                })
+                rooms = [room for room in rooms if room not in unreadable]
+                if not rooms:
+                    return []
+            
+            # Best-fitting free room for each start time
+            people_busy = [period for calendar_id in people for period in busy_by_calendar[calendar_id]]
+            best = {}
+            for rank, room in enumerate(rooms):
+                merged = intervals.merge(people_busy + busy_by_calendar[room.calendar_id])
+                for slot_start, slot_end in intervals.working_slots(
+                        merged, start_time, end_time, duration, step, work_start, work_end,
+                        limit=max_slots):
+                    if slot_start not in best or rank < best[slot_start][0]:
+                        best[slot_start] = (rank, slot_end, room)
+            
+            if len(best) >= max_slots or horizon >= max_days:
+                break
+            horizon = min(horizon * 2, max_days)
+        
+        return [
+            TimeSlot(start_time=slot_start, end_time=slot_end,
+                     duration_minutes=meeting_request.duration_minutes, room=room)
+            for slot_start, (_, slot_end, room) in sorted(best.items())[:max_slots]
+        ]
@@ -2,123 +2,205 @@
 Scheduler Agent - Orchestrates the meeting scheduling workflow
 """
 
-from typing import List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional
 
-from .models import TimeSlot, CalendarEvent
+from .models import (
+    TimeSlot, CalendarEvent, ScheduleResult, ScheduleOutcome, StageError
+)
 from .parser_agent import ParserAgent
 from .calendar_agent import CalendarAgent
+from .booking import BookingAgent
+from .directory import AttendeeDirectory
+from .rooms import RoomAgent
+from .events import EventCallback, ignore_event
+from ..exceptions.calpal_exceptions import SlotConflictError
 
 
 class SchedulerAgent:
-    """Main orchestrator agent that coordinates the scheduling workflow"""
+    """Main orchestrator agent that coordinates the scheduling workflow
     
-    def __init__(self, parser_agent: ParserAgent, calendar_agent: CalendarAgent):
+    Nothing is printed: progress is reported through the on_event callback,
+    and every request ends in a ScheduleResult describing what happened.
+    """
+    
+    def __init__(self, parser_agent: ParserAgent, calendar_agent: CalendarAgent,
+                 booking_agent: Optional[BookingAgent] = None,
+                 on_event: Optional[EventCallback] = None,
+                 confirm: Optional[Callable[[TimeSlot], bool]] = None,
+                 directory: Optional[AttendeeDirectory] = None,
+                 room_agent: Optional[RoomAgent] = None,
+                 stream_parse: bool = False):
         self.parser_agent = parser_agent
         self.calendar_agent = calendar_agent
+        self.directory = directory
+        self.room_agent = room_agent
+        # Streamed parses prefetch busy times as soon as the time constraint is known
+        self.stream_parse = stream_parse
+        # Long-lived threads, so prefetches reuse each thread's Calendar service and connection
+        self._prefetcher = (ThreadPoolExecutor(max_workers=2, thread_name_prefix='calpal-prefetch')
+                            if stream_parse else None)
+        self.on_event = on_event or ignore_event
+        self.booking_agent = booking_agent or BookingAgent(calendar_agent, on_event=self.on_event)
+        self.confirm = confirm
     
-    def schedule_meeting(self, natural_language_request: str) -> bool:
+    def schedule_meeting(self, natural_language_request: str) -> ScheduleResult:
         """Main method to schedule a meeting from natural language"""
-        print(f"Processing request: '{natural_language_request}'")
+        result = ScheduleResult(request=natural_language_request, outcome=ScheduleOutcome.FAILED)
+        self.on_event('request.received', {'request': natural_language_request})
         
         # Step 1: Parse the natural language request
-        print("Parsing meeting details...")
+        started = time.perf_counter()
+        prefetch = None
         try:
-            meeting_request = self.parser_agent.parse(natural_language_request)
-            print(f"Parsed meeting: {meeting_request.topic}")
-            print(f"   Attendees: {', '.join(meeting_request.attendees)}")
-            print(f"   Duration: {meeting_request.duration_minutes} minutes")
-            print(f"   Time constraint: {meeting_request.time_constraint}")
+            if self.stream_parse:
+                fields = {}
+                
+                def on_field(name, value):
+                    nonlocal prefetch
+                    fields[name] = value
+                    if name == 'time_constraint' and prefetch is None:
+                        try:
+                            prefetch = self._prefetcher.submit(self._prefetch_busy_times, dict(fields))
+                        except RuntimeError:
+                            # Closed while this request was running; the search queries itself
+                            pass
+                
+                result.meeting = self.parser_agent.parse_stream(natural_language_request, on_field)
+            else:
+                result.meeting = self.parser_agent.parse(natural_language_request)
         except Exception as e:
-            print(f"Failed to parse meeting request: {e}")
-            return False
+            result.outcome = ScheduleOutcome.PARSE_FAILED
+            result.errors.append(StageError(stage='parse', message=str(e)))
+            return result
+        finally:
+            result.timings_ms['parse'] = (time.perf_counter() - started) * 1000
+        self.on_event('parse.completed', {'meeting': result.meeting})
+        
+        # Resolve attendee names to emails and calendars
+        attendee_calendar_ids = None
+        if self.directory is not None:
+            resolution = self.directory.resolve_request(result.meeting)
+            result.meeting = resolution.meeting
+            result.unresolved_attendees = resolution.unresolved
+            attendee_calendar_ids = [contact.calendar for contact in resolution.contacts]
+            if resolution.unresolved:
+                self.on_event('attendees.unresolved', {'names': resolution.unresolved})
         
         # Step 2: Find available time slots
-        print("Finding available time slots...")
+        started = time.perf_counter()
+        if prefetch is not None:
+            # The search reuses the prefetched busy times instead of querying again
+            prefetch.result()
         try:
-            available_slots = self.calendar_agent.find_available_slots(
-                duration_minutes=meeting_request.duration_minutes,
-                time_constraint=meeting_request.time_constraint
-            )
-            
-            if not available_slots:
-                print("No available time slots found")
-                return False
-            
-            print(f"Found {len(available_slots)} available slots:")
-            for i, slot in enumerate(available_slots, 1):
-                print(f"   {i}. {slot.start_time.strftime('%A, %B %d at %I:%M %p')}")
-            
+            if self.room_agent is not None:
+                # Search rooms and people together so every slot comes with a free room
+                available_slots = self.room_agent.find_available_slots(
+                    result.meeting, attendee_calendar_ids=attendee_calendar_ids)
+            else:
+                available_slots = self.calendar_agent.find_available_slots(
+                    duration_minutes=result.meeting.duration_minutes,
+                    time_constraint=result.meeting.time_constraint,
+                    attendee_calendar_ids=attendee_calendar_ids
+                )
         except Exception as e:
-            print(f" Failed to find available slots: {e}")
-            return False
+            result.errors.append(StageError(stage='search', message=str(e)))
+            return result
+        finally:
+            result.timings_ms['search'] = (time.perf_counter() - started) * 1000
+        self.on_event('search.completed', {'slots': available_slots})
         
-        # Step 3: Propose time to user and get confirmation
-        print("\nProposed meeting time:")
-        proposed_slot = available_slots[0]  # Use the first available slot
-        print(f"{proposed_slot.start_time.strftime('%A, %B %d at %I:%M %p')}")
-        print(f"  Duration: {proposed_slot.duration_minutes} minutes")
+        if not available_slots:
+            result.outcome = ScheduleOutcome.NO_SLOTS
+            return result
         
-        # In a real CLI, you'd get user input here
-        # For now, we'll auto-confirm the first slot
-        confirmation = self._get_user_confirmation(proposed_slot)
+        # Step 3: Propose the best slot and get confirmation
+        proposed_slot = available_slots[0]
+        result.slot = proposed_slot
+        result.alternatives = available_slots[1:]
+        self.on_event('slot.proposed', {'slot': proposed_slot})
         
-        if not confirmation:
-            print("Meeting scheduling cancelled")
-            return False
+        if not self._get_user_confirmation(proposed_slot):
+            result.outcome = ScheduleOutcome.CANCELLED
+            return result
         
-        # Step 4: Create the calendar event
-        print("Creating calendar event...")
+        # Step 4: Book the proposed slot, falling back to the next-ranked ones on conflict
+        started = time.perf_counter()
         try:
             calendar_event = CalendarEvent(
-                summary=meeting_request.topic,
+                summary=result.meeting.topic,
                 start_time=proposed_slot.start_time,
                 end_time=proposed_slot.end_time,
-                attendees=meeting_request.attendees,
-                location=meeting_request.location,
-                description=meeting_request.description
+                attendees=result.meeting.attendees,
+                location=result.meeting.location,
+                description=result.meeting.description
             )
             
-            success = self.calendar_agent.create_event(calendar_event)
+            event_result = self.booking_agent.book(calendar_event, available_slots,
+                                                   attendee_calendar_ids=attendee_calendar_ids)
+        
+        except SlotConflictError as e:
+            result.outcome = ScheduleOutcome.CONFLICT
+            result.errors.append(StageError(stage='book', message=str(e)))
+            return result
+        except Exception as e:
+            result.errors.append(StageError(stage='book', message=str(e)))
+            return result
+        finally:
+            result.timings_ms['book'] = (time.perf_counter() - started) * 1000
+        
+        result.slot = next(slot for slot in available_slots
+                           if slot.start_time == event_result.event.start_time)
+        result.alternatives = [slot for slot in available_slots if slot is not result.slot]
+        result.event_link = event_result.link
+        result.outcome = ScheduleOutcome.SCHEDULED
+        self.on_event('event.created', {'slot': result.slot, 'link': result.event_link})
+        return result
+    
+    def close(self, wait: bool = True):
+        """Stop the prefetch threads; requests still running search without prefetching"""
+        if self._prefetcher is not None:
+            self._prefetcher.shutdown(wait=wait)
+    
+    def _prefetch_busy_times(self, fields: Dict[str, Any]):
+        """Warm the calendar agent's freebusy cache from partially parsed fields
+        
+        Only the first day of the search horizon and the rooms that fit the
+        meeting are fetched, as the search's first step queries no more.
+        """
+        try:
+            attendees = fields.get('attendees') or []
+            calendar_ids = []
+            if self.directory is not None:
+                contacts, _ = self.directory.resolve_many(attendees)
+                calendar_ids.extend(contact.calendar for contact in contacts)
+            if self.room_agent is not None:
+                rooms = self.room_agent.candidate_rooms(len(attendees) + 1, location=fields.get('location'))
+                calendar_ids.extend(room.calendar_id for room in rooms)
             
-            if success:
-                print("Meeting scheduled successfully!")
-                print(f"    {proposed_slot.start_time.strftime('%A, %B %d at %I:%M %p')}")
-                print(f"   👥 Attendees: {', '.join(meeting_request.attendees)}")
-                return True
-            else:
-                print("Failed to create calendar event")
-                return False
-                
+            start_time, _ = self.calendar_agent.get_search_window(fields['time_constraint'])
+            end_time = start_time + timedelta(days=1)
+            self.calendar_agent.get_busy_times(start_time, end_time, calendar_ids)
+            self.on_event('search.prefetched', {'start_time': start_time, 'end_time': end_time})
         except Exception as e:
-            print(f"Error creating calendar event: {e}")
-            return False
+            # The search queries again if the prefetch failed
+            self.on_event('search.prefetch_failed', {'error': str(e)})
     
     def _get_user_confirmation(self, proposed_slot: TimeSlot) -> bool:
         """Get user confirmation for the proposed time slot"""
-        # In a real implementation, this would prompt the user
-        # For now, we'll return True to auto-confirm
-        print("Auto-confirming first available slot...")
-        return True
+        # Without a confirm callback the first available slot is accepted
+        if self.confirm is None:
+            return True
+        return self.confirm(proposed_slot)
     
     def list_available_slots(self, duration_minutes: int, time_constraint: str) -> List[TimeSlot]:
-        """List available time slots without scheduling"""
-        print(f"🔍 Finding available slots for {duration_minutes} minutes...")
+        """List available time slots without scheduling
         
-        try:
-            available_slots = self.calendar_agent.find_available_slots(
-                duration_minutes=duration_minutes,
-                time_constraint=time_constraint
-            )
-            
-            if available_slots:
-                print(f"Found {len(available_slots)} available slots:")
-                for i, slot in enumerate(available_slots, 1):
-                    print(f"   {i}. {slot.start_time.strftime('%A, %B %d at %I:%M %p')}")
-            else:
-                print("No available time slots found")
-            
-            return available_slots
-            
-        except Exception as e:
-            print(f"Error finding available slots: {e}")
-            return []
+        Raises CalendarError if availability cannot be queried.
+        """
+        return self.calendar_agent.find_available_slots(
+            duration_minutes=duration_minutes,
+            time_constraint=time_constraint
+        )
@@ -0,0 +1,143 @@
+"""
+Scheduler Pool - Runs many scheduling requests in parallel on shared agents
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Iterable, List, Optional
+
+from .parser_agent import ParserAgent
+from .calendar_agent import CalendarAgent
+from .scheduler_agent import SchedulerAgent
+from .models import Room, ScheduleResult
+from .rooms import RoomAgent
+from .events import EventCallback
+from .directory import AttendeeDirectory
+
+
+# Queue marker telling a worker to exit
+_STOP = object()
+
+
+class _StageLimiter:
+    """Proxy that runs an agent's public methods under a shared semaphore"""
+    
+    def __init__(self, agent, semaphore: threading.Semaphore):
+        self._agent = agent
+        self._semaphore = semaphore
+    
+    def __getattr__(self, name):
+        attr = getattr(self._agent, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        
+        def limited(*args, **kwargs):
+            with self._semaphore:
+                return attr(*args, **kwargs)
+        
+        return limited
+
+
+class SchedulerPool:
+    """Thread pool that schedules meetings from a bounded request queue
+    
+    All workers share one ParserAgent and one CalendarAgent, so start-up and
+    authentication are paid once. LLM and calendar calls are capped separately;
+    the LLM cap is set on the parser itself so that its hedged calls count
+    against it too. submit() blocks when the queue is full to push back on producers.
+    """
+    
+    def __init__(self, parser_agent: ParserAgent, calendar_agent: CalendarAgent,
+                 workers: int = 4, queue_size: int = 32,
+                 llm_concurrency: int = 2, calendar_concurrency: int = 4,
+                 on_event: Optional[EventCallback] = None,
+                 directory: Optional[AttendeeDirectory] = None,
+                 rooms: Optional[List[Room]] = None,
+                 stream_parse: bool = False):
+        limited_calendar_agent = _StageLimiter(calendar_agent, threading.Semaphore(calendar_concurrency))
+        parser_agent.limit_concurrency(llm_concurrency)
+        self.scheduler_agent = SchedulerAgent(
+            parser_agent,
+            limited_calendar_agent,
+            on_event=on_event,
+            directory=directory,
+            room_agent=RoomAgent(limited_calendar_agent, rooms, on_event) if rooms else None,
+            stream_parse=stream_parse
+        )
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._shutdown_lock = threading.Lock()
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"calpal-scheduler-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+    
+    def submit(self, natural_language_request: str, timeout: Optional[float] = None) -> Future:
+        """Queue a request and return a future for its scheduling result
+        
+        Blocks while the queue is full; raises queue.Full if timeout expires first.
+        """
+        future = Future()
+        # Hold the lock so a request can never land behind the stop markers
+        with self._shutdown_lock:
+            if self._closed:
+                raise RuntimeError("cannot submit requests after shutdown")
+            self._queue.put((future, natural_language_request), timeout=timeout)
+        return future
+    
+    def map(self, natural_language_requests: Iterable[str]) -> List[ScheduleResult]:
+        """Schedule every request and return the results in order"""
+        futures = [self.submit(request) for request in natural_language_requests]
+        return [future.result() for future in futures]
+    
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """Stop accepting requests and drain the queue
+        
+        Queued requests are still processed unless cancel_pending is set.
+        """
+        with self._shutdown_lock:
+            if self._closed:
+                return
+            self._closed = True
+        
+        if cancel_pending:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                item[0].cancel()
+        
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        self.scheduler_agent.close(wait=wait)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=True)
+        return False
+    
+    def _worker(self):
+        """Process queued requests until told to stop"""
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            
+            future, natural_language_request = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            
+            try:
+                future.set_result(self.scheduler_agent.schedule_meeting(natural_language_request))
+            except BaseException as e:
+                future.set_exception(e)
@@ -0,0 +1,231 @@
+"""
+Tenant Registry - Per-tenant CalendarAgents for a service scheduling on behalf of many accounts
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import build_http
+
+from .models import Tenant
+from .calendar_agent import CalendarAgent
+from .credentials import CredentialManager
+from .events import EventCallback, ignore_event
+from ..exceptions.calpal_exceptions import ConfigurationError
+
+
+class _TokenBucket:
+    """Blocking rate limiter allowing `rate` acquisitions per second with bursts up to `burst`"""
+    
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """Take one token, waiting for it if needed; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+
+class _RateLimitedHttp(AuthorizedHttp):
+    """AuthorizedHttp that takes a token from its tenant's bucket before each HTTP request
+    
+    Every Calendar API call goes through here, whichever agent method, booking
+    or warmer made it; a batch request is one HTTP request.
+    """
+    
+    def __init__(self, credentials, bucket: _TokenBucket, http=None):
+        super().__init__(credentials, http=http)
+        self.bucket = bucket
+    
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        self.bucket.acquire()
+        return super().request(uri, method, body=body, headers=headers, **kwargs)
+
+
+def _build_service(credentials, bucket: _TokenBucket):
+    """Build a tenant's rate-limited Calendar service over its own connection pool"""
+    return build('calendar', 'v3', http=_RateLimitedHttp(credentials, bucket, http=build_http()))
+
+
+class _SharedTransport:
+    """Builds Calendar services from one parsed discovery document over per-thread connection pools
+    
+    httplib2 connections are not thread-safe, so each thread has one pool
+    that every tenant's service on that thread uses. Each service wraps the
+    pool with its own tenant's credentials, and the pool keeps no response
+    cache, so nothing leaks between tenants.
+    """
+    
+    def __init__(self):
+        self._document = json.loads(get_static_doc('calendar', 'v3'))
+        self._local = threading.local()
+    
+    def build_service(self, credentials, bucket: _TokenBucket):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = self._local.http = build_http()
+        return build_from_document(self._document, http=_RateLimitedHttp(credentials, bucket, http=http))
+
+
+class TenantRegistry:
+    """Lazily creates and caches one authenticated CalendarAgent per tenant
+    
+    The first request for a tenant authenticates and builds its agent; later
+    requests reuse it, with its credentials, services and freebusy cache.
+    At most max_active agents are kept, evicting the least recently used, so
+    memory stays bounded with any number of registered tenants. Each tenant
+    has its own rate limit on Calendar API requests. With share_http, services are
+    built from one shared discovery document over per-thread connection
+    pools shared by all tenants. agent_options are passed to every
+    CalendarAgent, e.g. freebusy_ttl or step_minutes.
+    """
+    
+    def __init__(self, tenants: Iterable[Tenant] = (), max_active: int = 256,
+                 requests_per_second: float = 10.0, burst: int = 20, share_http: bool = True,
+                 on_event: Optional[EventCallback] = None, **agent_options):
+        self.max_active = max_active
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.agent_options = agent_options
+        self.on_event = on_event or ignore_event
+        self._transport = _SharedTransport() if share_http else None
+        self._tenants: Dict[str, Tenant] = {}
+        self._active: 'OrderedDict[str, CalendarAgent]' = OrderedDict()
+        self._building: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._counts = {'hits': 0, 'created': 0, 'evicted': 0}
+        for tenant in tenants:
+            self.register(tenant)
+    
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'TenantRegistry':
+        """Load tenants from a JSON file holding a list of tenants or {"tenants": [...]}"""
+        with open(path, encoding='utf-8') as tenants_file:
+            config = json.load(tenants_file)
+        
+        if isinstance(config, dict):
+            config = config.get('tenants', [])
+        if not isinstance(config, list):
+            raise ConfigurationError(f"Tenants file must contain a list of tenants: {path}")
+        
+        return cls((Tenant(**tenant) for tenant in config), **kwargs)
+    
+    def register(self, tenant: Tenant):
+        """Add or replace a tenant; a replaced tenant's agent is dropped"""
+        with self._lock:
+            self._tenants[tenant.tenant_id] = tenant
+            evicted = self._active.pop(tenant.tenant_id, None)
+        if evicted is not None:
+            self._release(tenant.tenant_id, evicted)
+    
+    def unregister(self, tenant_id: str):
+        """Remove a tenant and drop its agent"""
+        with self._lock:
+            self._tenants.pop(tenant_id, None)
+            evicted = self._active.pop(tenant_id, None)
+        if evicted is not None:
+            self._release(tenant_id, evicted)
+    
+    def tenants(self) -> List[str]:
+        """Ids of all registered tenants"""
+        with self._lock:
+            return list(self._tenants)
+    
+    def get(self, tenant_id: str) -> CalendarAgent:
+        """The tenant's CalendarAgent, created on first use
+        
+        Concurrent first requests for one tenant build a single agent, and
+        building one tenant's agent never blocks requests for others.
+        Raises ConfigurationError for an unknown tenant.
+        """
+        with self._lock:
+            agent = self._cached(tenant_id)
+            if agent is not None:
+                return agent
+            tenant = self._tenants.get(tenant_id)
+            if tenant is None:
+                raise ConfigurationError(f"Unknown tenant: {tenant_id}")
+            building = self._building.setdefault(tenant_id, threading.Lock())
+        
+        with building:
+            with self._lock:
+                agent = self._cached(tenant_id)
+                if agent is not None:
+                    return agent
+            
+            try:
+                agent = self._create(tenant)
+            except Exception:
+                with self._lock:
+                    self._building.pop(tenant_id, None)
+                raise
+
+            with self._lock:
+                self._active[tenant_id] = agent
+                self._building.pop(tenant_id, None)
+                self._counts['created'] += 1
+                evicted = []
+                while len(self._active) > self.max_active:
+                    evicted.append(self._active.popitem(last=False))
+        
+        self.on_event('tenant.created', {'tenant_id': tenant_id})
+        for evicted_id, evicted_agent in evicted:
+            self._release(evicted_id, evicted_agent)
+        return agent
+    
+    def stats(self) -> Dict[str, Any]:
+        """Registered and active tenants, cache hits, agents created and evicted"""
+        with self._lock:
+            return {'tenants': len(self._tenants), 'active': len(self._active), **self._counts}
+    
+    def _cached(self, tenant_id: str) -> Optional[CalendarAgent]:
+        """The active agent for a tenant, marking it recently used; caller holds the lock"""
+        agent = self._active.get(tenant_id)
+        if agent is not None:
+            self._active.move_to_end(tenant_id)
+            self._counts['hits'] += 1
+        return agent
+    
+    def _create(self, tenant: Tenant) -> CalendarAgent:
+        """Authenticate and build a tenant's agent, its services limited by the tenant's bucket"""
+        options = dict(self.agent_options)
+        rate = tenant.requests_per_second or self.requests_per_second
+        build_service = self._transport.build_service if self._transport is not None else _build_service
+        options.setdefault('service_factory',
+                           functools.partial(build_service, bucket=_TokenBucket(rate, self.burst)))
+        return CalendarAgent(tenant.credentials_file, tenant.token_file, tenant.calendar_id, **options)
+    
+    def _release(self, tenant_id: str, agent: CalendarAgent):
+        """Drop an evicted agent's shared credentials unless an active tenant still uses them"""
+        token_file = os.path.abspath(agent.token_file)
+        # Checked and released under one lock, so an agent activated meanwhile keeps them
+        with self._lock:
+            self._counts['evicted'] += 1
+            if not any(os.path.abspath(active.token_file) == token_file for active in self._active.values()):
+                CredentialManager.release(token_file)
+        self.on_event('tenant.evicted', {'tenant_id': tenant_id})
@@ -0,0 +1,110 @@
+"""
+Availability Warmer - Prefetches freebusy for the calendars and days requested most
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from .calendar_agent import CalendarAgent
+from .events import EventCallback, ignore_event
+
+
+class AvailabilityWarmer:
+    """Background refresher that keeps likely freebusy windows in the agent's cache
+    
+    Every interval_seconds it looks at the agent's recent queries, picks the
+    top_n calendars asked for most, and refetches them over the window from
+    now to the furthest end requested (at most horizon_days ahead). Each
+    refresh costs one freebusy query per FREEBUSY_MAX_ITEMS calendars, and
+    refreshes stop once max_queries_per_hour would be exceeded, so the warmer
+    never uses more than its share of the API quota.
+    """
+    
+    def __init__(self, calendar_agent: CalendarAgent, top_n: int = 10, horizon_days: int = 14,
+                 interval_seconds: float = 240, max_queries_per_hour: int = 60,
+                 on_event: Optional[EventCallback] = None):
+        self.calendar_agent = calendar_agent
+        self.top_n = top_n
+        self.horizon_days = horizon_days
+        self.interval_seconds = interval_seconds
+        self.max_queries_per_hour = max_queries_per_hour
+        self.on_event = on_event or ignore_event
+        self._query_times: List[float] = []
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start refreshing in a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='calpal-warmer', daemon=True)
+        self._thread.start()
+    
+    def stop(self, wait: bool = True):
+        """Stop refreshing, optionally waiting for a refresh in progress to finish"""
+        self._stopped.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+    
+    def targets(self) -> Tuple[List[str], Optional[datetime], Optional[datetime]]:
+        """The calendars and window the next refresh would fetch, from recent queries"""
+        queries = self.calendar_agent.recent_queries()
+        if not queries:
+            return [], None, None
+        
+        counts = Counter(calendar_id for query in queries for calendar_id in query.calendar_ids)
+        calendar_ids = [calendar_id for calendar_id, _ in counts.most_common(self.top_n)]
+        
+        now = datetime.now()
+        end_time = min(max(query.end_time for query in queries),
+                       now + timedelta(days=self.horizon_days))
+        if end_time <= now:
+            return [], None, None
+        return calendar_ids, now, end_time
+    
+    def warm_once(self) -> int:
+        """Refresh the current targets once, returning the number of calendars fetched"""
+        calendar_ids, start_time, end_time = self.targets()
+        if not calendar_ids:
+            return 0
+        
+        # Fit as many of the top calendars as the remaining budget allows
+        per_query = self.calendar_agent.FREEBUSY_MAX_ITEMS
+        budget = self._remaining_budget()
+        calendar_ids = calendar_ids[:budget * per_query]
+        if not calendar_ids:
+            self.on_event('warmer.skipped', {'reason': 'quota budget exhausted'})
+            return 0
+        
+        queries = -(-len(calendar_ids) // per_query)
+        self._query_times.extend([time.monotonic()] * queries)
+        try:
+            self.calendar_agent.fetch_busy_times(calendar_ids, start_time, end_time)
+        except HttpError as error:
+            self.on_event('warmer.failed', {'error': str(error)})
+            return 0
+        
+        self.on_event('warmer.refreshed', {'calendars': calendar_ids, 'start_time': start_time,
+                                           'end_time': end_time, 'queries': queries})
+        return len(calendar_ids)
+    
+    def _remaining_budget(self) -> int:
+        """Freebusy queries still allowed in the current hour"""
+        cutoff = time.monotonic() - 3600
+        self._query_times = [queried_at for queried_at in self._query_times if queried_at > cutoff]
+        return max(self.max_queries_per_hour - len(self._query_times), 0)
+    
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.warm_once()
+            except Exception as error:
+                # A failed refresh only means colder data; keep the thread alive
+                self.on_event('warmer.failed', {'error': str(error)})
+            self._stopped.wait(self.interval_seconds)
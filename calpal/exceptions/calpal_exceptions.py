@@ -27,3 +27,13 @@ class ConfigurationError(CalPalException):
     """Raised when configuration is invalid"""
     pass
 
+
+
+class SlotConflictError(CalendarError):
+    """Raised when every candidate slot was taken before it could be booked"""
+    pass
+
+
+class ReplayError(CalPalException):
+    """Raised when a replayed session has no recorded interaction for a call"""
+    pass
@@ -0,0 +1,130 @@
+"""
+CalPal Single-Pass Extractor
+
+Scans a meeting request once with a single precompiled tokenizer and returns
+emails, names, durations, dates and times together.
+"""
+
+import re
+from typing import Iterable, List, NamedTuple, Tuple
+
+
+# Capitalized words that are never attendee names
+NON_NAME_WORDS = frozenset({
+    'Meeting', 'Lunch', 'Dinner', 'Breakfast', 'Call', 'Coffee', 'Sync', 'Standup',
+    'Meet', 'Team', 'Project', 'Review', 'Discussion', 'Interview', 'Demo',
+    'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday',
+    'January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+    'September', 'October', 'November', 'December',
+    'Today', 'Tomorrow', 'Tonight', 'Next', 'This', 'Week', 'Month', 'Year',
+    'Morning', 'Afternoon', 'Evening', 'Noon',
+    'With', 'And', 'At', 'On', 'For', 'About', 'The', 'In', 'To', 'Schedule', 'Book',
+})
+
+EMAIL_PATTERN = r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}'
+
+# Splits text into emails, clock times, numbers and words in one C-level scan;
+# the tokens are then classified with set lookups instead of further regexes.
+_TOKEN_RE = re.compile(rf'{EMAIL_PATTERN}|\d{{1,2}}:\d{{2}}|\d+|[A-Za-z]+')
+_EMAIL_RE = re.compile(EMAIL_PATTERN)
+
+_WEEKDAYS = frozenset({'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'})
+_MONTHS = frozenset({
+    'january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september',
+    'october', 'november', 'december', 'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug',
+    'sep', 'sept', 'oct', 'nov', 'dec'
+})
+_DAY_WORDS = frozenset({'today', 'tomorrow', 'tonight'})
+_RELATIVE_WORDS = frozenset({'next', 'this'})
+_RELATIVE_TARGETS = _WEEKDAYS | {'week', 'month'}
+_ORDINAL_SUFFIXES = frozenset({'st', 'nd', 'rd', 'th'})
+_HOUR_UNITS = frozenset({'hour', 'hours', 'hr', 'hrs'})
+_MINUTE_UNITS = frozenset({'minute', 'minutes', 'min', 'mins'})
+_NOON_WORDS = frozenset({'noon', 'midday'})
+
+
+class Extraction(NamedTuple):
+    """Everything extracted from one request"""
+    emails: List[str]
+    names: List[str]
+    durations: List[int]  # Minutes
+    dates: List[str]  # Lowercased, e.g. 'next thursday', 'tomorrow'
+    times: List[Tuple[int, int]]  # 24-hour (hour, minute)
+
+
+def extract(text: str) -> Extraction:
+    """Extract emails, names, durations, dates and times in a single scan"""
+    emails = []
+    names = []
+    durations = []
+    dates = []
+    times = []
+    
+    tokens = _TOKEN_RE.findall(text)
+    count = len(tokens)
+    i = 0
+    while i < count:
+        token = tokens[i]
+        following = tokens[i + 1].lower() if i + 1 < count else ''
+        first = token[0]
+        
+        if '@' in token:
+            emails.append(token)
+        elif first.isdigit():
+            if ':' in token:
+                hour, minute = token.split(':')
+                if following in ('am', 'pm'):
+                    times.append(_to_24_hour(int(hour), int(minute), following))
+                    i += 1
+                else:
+                    times.append((int(hour), int(minute)))
+            elif following in _HOUR_UNITS:
+                durations.append(int(token) * 60)
+                i += 1
+            elif following in _MINUTE_UNITS:
+                durations.append(int(token))
+                i += 1
+            elif following in ('am', 'pm') and len(token) <= 2:
+                times.append(_to_24_hour(int(token), 0, following))
+                i += 1
+        else:
+            word = token.lower()
+            if word in _RELATIVE_WORDS and following in _RELATIVE_TARGETS:
+                dates.append(f"{word} {following}")
+                i += 1
+            elif word in _WEEKDAYS or word in _DAY_WORDS:
+                dates.append(word)
+            elif word in _MONTHS and following.isdigit() and len(following) <= 2:
+                date = f"{word} {following}"
+                i += 1
+                if i + 1 < count and tokens[i + 1].lower() in _ORDINAL_SUFFIXES:
+                    date += tokens[i + 1].lower()
+                    i += 1
+                dates.append(date)
+            elif word in _NOON_WORDS:
+                times.append((12, 0))
+            elif (first.isupper() and len(token) > 1 and token[1:].islower()
+                  and token not in NON_NAME_WORDS):
+                names.append(token)
+        i += 1
+    
+    return Extraction(emails, names, durations, dates, times)
+
+
+def extract_many(texts: Iterable[str]) -> List[Extraction]:
+    """Extract from many requests, e.g. a whole batch or corpus"""
+    return [extract(text) for text in texts]
+
+
+def is_email(text: str) -> bool:
+    """Check whether text is a single email address"""
+    return _EMAIL_RE.fullmatch(text.strip()) is not None
+
+
+def _to_24_hour(hour: int, minute: int, period: str) -> Tuple[int, int]:
+    """Convert a 12-hour clock time to a 24-hour (hour, minute) pair"""
+    if period == 'pm' and hour != 12:
+        hour += 12
+    elif period == 'am' and hour == 12:
+        hour = 0
+    return hour, minute
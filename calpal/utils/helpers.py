@@ -2,46 +2,26 @@
 CalPal Helper Utilities
 """
 
-import re
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List
+
+from .extractor import extract, is_email
 
 
 def extract_emails(text: str) -> List[str]:
     """Extract email addresses from text"""
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    return re.findall(email_pattern, text)
+    return extract(text).emails
 
 
 def extract_names(text: str) -> List[str]:
     """Extract potential names from text"""
-    name_pattern = r'\b[A-Z][a-z]+\b'
-    names = re.findall(name_pattern, text)
-    # Filter out common non-name words
-    exclude_words = {
-        'Meeting', 'Lunch', 'Dinner', 'Call', 'Coffee', 'Team', 'Project',
-        'Review', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
-        'Saturday', 'Sunday', 'January', 'February', 'March', 'April',
-        'May', 'June', 'July', 'August', 'September', 'October', 'November',
-        'December', 'Tomorrow', 'Today', 'Next', 'Week', 'Month', 'Year'
-    }
-    return [name for name in names if name not in exclude_words]
+    return extract(text).names
 
 
 def parse_duration(text: str) -> int:
     """Parse duration from text and return minutes"""
-    duration_pattern = r'(\d+)\s*(hour|hr|minute|min)'
-    duration_match = re.search(duration_pattern, text, re.IGNORECASE)
-    
-    if duration_match:
-        value = int(duration_match.group(1))
-        unit = duration_match.group(2).lower()
-        if unit in ['hour', 'hr']:
-            return value * 60
-        else:
-            return value
-    
-    return 60  # Default 1 hour
+    durations = extract(text).durations
+    return durations[0] if durations else 60  # Default 1 hour
 
 
 def format_datetime(dt: datetime) -> str:
@@ -0,0 +1,91 @@
+"""
+CalPal Incremental JSON Parser
+
+Consumes an LLM response chunk by chunk and reports each top-level field of
+the first JSON object as soon as its value is complete, without waiting for
+the rest of the response.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+
+class IncrementalJSONParser:
+    """Incremental parser for the first JSON object in a stream of text
+    
+    Text before the object, such as a code fence, is skipped. Nested arrays
+    and objects, strings and escapes are tracked so a comma or brace inside
+    a value never ends a field early. Each character is scanned once, no
+    matter how the text is split into chunks.
+    """
+    
+    def __init__(self):
+        self.buffer = ''
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._position = 0
+        self._object_start: Optional[int] = None
+        self._member_start = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """Add a chunk of text and return the fields completed by it"""
+        if self.done:
+            return {}
+        
+        self.buffer += chunk
+        completed = {}
+        buffer = self.buffer
+        position = self._position
+        
+        while position < len(buffer):
+            char = buffer[position]
+            
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._object_start is None:
+                if char == '{':
+                    self._object_start = position
+                    self._member_start = position + 1
+                    self._depth = 1
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.update(self._parse_member(buffer[self._member_start:position]))
+                    self.done = True
+                    position += 1
+                    break
+            elif char == ',' and self._depth == 1:
+                completed.update(self._parse_member(buffer[self._member_start:position]))
+                self._member_start = position + 1
+            
+            position += 1
+        
+        self._position = position
+        self.fields.update(completed)
+        return completed
+    
+    @property
+    def object_text(self) -> Optional[str]:
+        """The complete JSON object text, once the object has closed"""
+        if not self.done:
+            return None
+        return self.buffer[self._object_start:self._position]
+    
+    @staticmethod
+    def _parse_member(member: str) -> Dict[str, Any]:
+        """Parse one '"key": value' member, or nothing if it is empty"""
+        if not member.strip():
+            return {}
+        return json.loads('{' + member + '}')
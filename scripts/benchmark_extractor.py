@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass extractor against separate per-field regex scans
+
+Usage: python scripts/benchmark_extractor.py [number_of_requests]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calpal.utils.extractor import extract_many
+
+
+TEMPLATES = [
+    "Lunch with {name} next Thursday at {hour}pm",
+    "Team meeting tomorrow at {hour}am for {amount} hours with {email}",
+    "Coffee with {name} and {other} next week",
+    "Project review with the team on Friday at {hour}pm for {minutes} minutes",
+    "Call {name} ({email}) on May 5th at {hour}:30 for {minutes} min",
+]
+WEEKDAYS = r'monday|tuesday|wednesday|thursday|friday|saturday|sunday'
+MONTHS = r'january|february|march|april|may|june|july|august|september|october|november|december'
+NAMES = ["John", "Sarah", "Mike", "Alice", "Priya", "Tomas", "Wei", "Fatima"]
+
+
+def make_corpus(size):
+    """Build a reproducible corpus of synthetic meeting requests"""
+    rng = random.Random(42)
+    corpus = []
+    for _ in range(size):
+        name, other = rng.sample(NAMES, 2)
+        corpus.append(rng.choice(TEMPLATES).format(
+            name=name, other=other, email=f"{other.lower()}@example.com",
+            hour=rng.randint(1, 11), amount=rng.randint(1, 3), minutes=rng.choice([15, 30, 45, 90])
+        ))
+    return corpus
+
+
+def separate_scans(text):
+    """The previous approach: one regex scan of the text per field"""
+    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b', text)
+    names = re.findall(r'\b[A-Z][a-z]+\b', text)
+    durations = re.findall(r'(\d+)\s*(hour|hr|minute|min)', text, re.IGNORECASE)
+    times = re.findall(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b(\d{1,2}):(\d{2})\b|\bnoon\b',
+                       text, re.IGNORECASE)
+    dates = re.findall(rf'\b(?:(?:next|this)\s+(?:{WEEKDAYS}|week|month)|{WEEKDAYS}|today|tomorrow'
+                       rf'|(?:{MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?)\b', text, re.IGNORECASE)
+    return emails, names, durations, times, dates
+
+
+def bench(label, func, corpus):
+    started = time.perf_counter()
+    func(corpus)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {elapsed * 1000:9.1f} ms  {len(corpus) / elapsed:12,.0f} requests/s")
+    return elapsed
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    corpus = make_corpus(size)
+    print(f"Extracting fields from {size:,} requests")
+    print("=" * 60)
+    
+    separate = bench("separate scans", lambda texts: [separate_scans(text) for text in texts], corpus)
+    single = bench("single-pass extract", extract_many, corpus)
+    print(f"speedup: {separate / single:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Test CalPal calendar density analytics
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from calpal.core import CalendarAnalyzer
+from calpal.core.calendar_agent import BusyTimes
+
+
+MONDAY = datetime(2030, 1, 7)
+
+
+class FakeCalendarAgent:
+    def __init__(self, busy_by_calendar, errors=None):
+        self.busy_by_calendar = busy_by_calendar
+        self.errors = errors or {}
+        self.fetches = []
+    
+    def fetch_busy_times(self, calendar_ids, start_time, end_time):
+        self.fetches.append((list(calendar_ids), start_time, end_time))
+        return BusyTimes(
+            ((calendar_id, [(start, end) for start, end in self.busy_by_calendar.get(calendar_id, [])
+                            if start < end_time and end > start_time])
+             for calendar_id in calendar_ids if calendar_id not in self.errors),
+            {calendar_id: self.errors[calendar_id] for calendar_id in calendar_ids
+             if calendar_id in self.errors})
+
+
+def at(day, hour, minute=0):
+    return MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+def test_utilization_fragmentation_and_free_blocks():
+    calendar = FakeCalendarAgent({'busy@example.com': [
+        (at(0, 9), at(0, 10)), (at(0, 9, 30), at(0, 11)),  # Overlapping
+        (at(0, 11, 15), at(0, 12)),  # Leaves a 15-minute gap
+        (at(5, 10), at(5, 12)),  # Saturday, outside working days
+    ]})
+    analyzer = CalendarAnalyzer(calendar)
+    
+    report = analyzer.analyze(['busy@example.com', 'free@example.com'], MONDAY, MONDAY + timedelta(days=7))
+    busy, free = report['calendars']
+    
+    assert busy['working_minutes'] == 5 * 480
+    assert busy['busy_minutes'] == 165
+    assert busy['utilization'] == pytest.approx(165 / 2400)
+    assert busy['free_blocks'] == 6
+    assert busy['fragmentation'] == pytest.approx(15 / (2400 - 165))
+    assert free['utilization'] == 0 and free['free_blocks'] == 5
+    assert report['summary']['free_block_histogram'] == {
+        '0-15': 0, '15-30': 1, '30-60': 0, '60-120': 0, '120-240': 0, '240+': 10
+    }
+
+
+def test_long_horizons_are_fetched_in_cached_pages():
+    calendar = FakeCalendarAgent({})
+    analyzer = CalendarAnalyzer(calendar, page_days=30)
+    
+    analyzer.analyze(['a@example.com', 'b@example.com'], MONDAY, MONDAY + timedelta(days=90))
+    assert len(calendar.fetches) == 3
+    assert all(end - start == timedelta(days=30) for _, start, end in calendar.fetches)
+    
+    # Only the new calendar is fetched on the next report
+    analyzer.analyze(['a@example.com', 'c@example.com'], MONDAY, MONDAY + timedelta(days=90))
+    assert [ids for ids, _, _ in calendar.fetches[3:]] == [['c@example.com']] * 3
+
+
+def test_unreadable_calendars_are_reported_not_counted_as_free():
+    calendar = FakeCalendarAgent({'busy@example.com': [(at(0, 9), at(0, 17))]},
+                                 errors={'missing@example.com': 'notFound'})
+    analyzer = CalendarAnalyzer(calendar, page_days=2)
+    
+    report = analyzer.analyze(['busy@example.com', 'missing@example.com'], MONDAY, MONDAY + timedelta(days=5))
+    
+    assert report['calendars'][1] == {'calendar_id': 'missing@example.com', 'error': 'notFound'}
+    assert report['summary']['calendars'] == 1
+    assert report['summary']['unreadable'] == 1
+    assert report['summary']['busy_minutes'] == 480
+    # An unreadable calendar is not asked for again on later pages
+    assert [ids for ids, _, _ in calendar.fetches] == [
+        ['busy@example.com', 'missing@example.com'], ['busy@example.com'], ['busy@example.com']
+    ]
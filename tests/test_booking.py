@@ -0,0 +1,129 @@
+"""
+Test CalPal booking stage under concurrent schedulers
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from calpal.core import BookingAgent, SlotReservations, TimeSlot, CalendarEvent, EventResult
+from calpal.exceptions.calpal_exceptions import SlotConflictError
+
+
+class FakeCalendarAgent:
+    """In-memory stand-in for CalendarAgent"""
+    
+    def __init__(self, busy=None, attendee_busy=None):
+        self.calendar_id = 'primary'
+        self.token_file = 'token.json'
+        self.busy = list(busy or [])
+        self.attendee_busy = attendee_busy or {}
+        self.created = []
+    
+    def is_slot_free(self, start_time, end_time, attendee_calendar_ids=None):
+        busy = self.busy + [period for calendar_id in attendee_calendar_ids or []
+                            for period in self.attendee_busy.get(calendar_id, [])]
+        return not any(start_time < end and end_time > start for start, end in busy)
+    
+    def create_event(self, event):
+        self.created.append(event)
+        self.busy.append((event.start_time, event.end_time))
+        return EventResult(event=event, link='https://calendar.example/event')
+
+
+def make_slots(count):
+    start = datetime(2030, 1, 7, 9, 0)
+    return [
+        TimeSlot(start_time=start + timedelta(minutes=30 * i),
+                 end_time=start + timedelta(minutes=30 * i + 30),
+                 duration_minutes=30)
+        for i in range(count)
+    ]
+
+
+def make_event(slot):
+    return CalendarEvent(summary="Sync", start_time=slot.start_time,
+                         end_time=slot.end_time, attendees=[])
+
+
+def test_reservations_reject_overlap():
+    reservations = SlotReservations()
+    slot = make_slots(1)[0]
+    assert reservations.reserve('primary', slot.start_time, slot.end_time)
+    assert not reservations.reserve('primary', slot.start_time, slot.end_time)
+    assert reservations.reserve('other', slot.start_time, slot.end_time)
+    
+    reservations.release('primary', slot.start_time, slot.end_time)
+    assert reservations.reserve('primary', slot.start_time, slot.end_time)
+
+
+def test_book_falls_back_when_slot_taken():
+    slots = make_slots(3)
+    calendar = FakeCalendarAgent(busy=[(slots[0].start_time, slots[0].end_time)])
+    booking = BookingAgent(calendar, reservations=SlotReservations())
+    
+    result = booking.book(make_event(slots[0]), slots)
+    assert result.success
+    assert result.event.start_time == slots[1].start_time
+    assert calendar.created[0].start_time == slots[1].start_time
+
+
+def test_book_rechecks_attendee_calendars():
+    slots = make_slots(3)
+    # The attendee was booked at the first slot after the search
+    calendar = FakeCalendarAgent(attendee_busy={
+        'john@example.com': [(slots[0].start_time, slots[0].end_time)]
+    })
+    booking = BookingAgent(calendar, reservations=SlotReservations())
+    
+    result = booking.book(make_event(slots[0]), slots, attendee_calendar_ids=['john@example.com'])
+    assert result.event.start_time == slots[1].start_time
+
+
+def test_holds_on_primary_are_per_account():
+    slots = make_slots(2)
+    reservations = SlotReservations()
+    first, second = FakeCalendarAgent(), FakeCalendarAgent()
+    second.token_file = 'other-tenant-token.json'
+    
+    # Each account's 'primary' is its own calendar, so both get the first slot
+    for calendar in (first, second):
+        result = BookingAgent(calendar, reservations=reservations).book(make_event(slots[0]), slots)
+        assert result.event.start_time == slots[0].start_time
+    
+    # A shared calendar is held across accounts
+    first, second = FakeCalendarAgent(), FakeCalendarAgent()
+    second.token_file = 'other-tenant-token.json'
+    first.calendar_id = second.calendar_id = 'team@example.com'
+    BookingAgent(first, reservations=reservations).book(make_event(slots[0]), slots)
+    result = BookingAgent(second, reservations=reservations).book(make_event(slots[0]), slots)
+    assert result.event.start_time == slots[1].start_time
+
+
+def test_book_raises_when_all_taken():
+    slots = make_slots(2)
+    calendar = FakeCalendarAgent(busy=[(slots[0].start_time, slots[-1].end_time)])
+    booking = BookingAgent(calendar, reservations=SlotReservations())
+    
+    with pytest.raises(SlotConflictError):
+        booking.book(make_event(slots[0]), slots)
+
+
+def test_parallel_bookings_never_double_book():
+    slots = make_slots(5)
+    calendar = FakeCalendarAgent()
+    reservations = SlotReservations()
+    booked = []
+    
+    def worker():
+        booking = BookingAgent(calendar, reservations=reservations)
+        booked.append(booking.book(make_event(slots[0]), slots).event)
+    
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len({slot.start_time for slot in booked}) == 5
@@ -0,0 +1,85 @@
+"""
+Test CalPal shared credential cache
+"""
+
+import json
+import pickle
+import threading
+from datetime import datetime, timedelta
+
+from google.oauth2.credentials import Credentials
+
+from calpal.core.credentials import CredentialManager
+
+
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+
+
+def make_credentials(expires_in):
+    return Credentials(
+        token='access-token',
+        refresh_token='refresh-token',
+        client_id='client-id',
+        client_secret='client-secret',
+        token_uri='https://oauth2.googleapis.com/token',
+        scopes=SCOPES,
+        expiry=datetime.utcnow() + expires_in
+    )
+
+
+def test_manager_is_shared_per_token_file(tmp_path):
+    token_file = str(tmp_path / 'token.json')
+    first = CredentialManager.for_token_file('credentials.json', token_file, SCOPES)
+    second = CredentialManager.for_token_file('credentials.json', token_file, SCOPES)
+    assert first is second
+
+
+def test_legacy_pickled_token_is_migrated(tmp_path):
+    token_file = tmp_path / 'token.json'
+    token_file.write_bytes(pickle.dumps(make_credentials(timedelta(hours=1))))
+    
+    manager = CredentialManager('credentials.json', str(token_file), SCOPES)
+    creds = manager.get_credentials()
+    
+    assert creds.token == 'access-token'
+    assert json.loads(token_file.read_text())['refresh_token'] == 'refresh-token'
+
+
+def test_refresh_is_single_flight(tmp_path, monkeypatch):
+    token_file = tmp_path / 'token.json'
+    token_file.write_text(make_credentials(timedelta(minutes=1)).to_json())
+    refreshes = []
+    
+    def fake_refresh(self, request):
+        refreshes.append(1)
+        self.token = 'refreshed-token'
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+    
+    monkeypatch.setattr(Credentials, 'refresh', fake_refresh)
+    manager = CredentialManager('credentials.json', str(token_file), SCOPES)
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get_credentials()))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(refreshes) == 1
+    assert all(creds is results[0] and creds.token == 'refreshed-token' for creds in results)
+    assert json.loads(token_file.read_text())['token'] == 'refreshed-token'
+
+
+def test_reauthorized_refresh_token_replaces_revoked_one(tmp_path, monkeypatch):
+    manager = CredentialManager('credentials.json', str(tmp_path / 'token.json'), SCOPES)
+    manager._credentials = make_credentials(timedelta(seconds=-1))
+    shared = manager._credentials
+    
+    reauthorized = make_credentials(timedelta(hours=1))
+    reauthorized._refresh_token = 'new-refresh-token'
+    monkeypatch.setattr(manager, '_load_or_refresh', lambda: reauthorized)
+    
+    assert manager.get_credentials() is shared
+    assert shared.refresh_token == 'new-refresh-token'
+    assert shared.token == 'access-token'
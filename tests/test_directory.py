@@ -0,0 +1,64 @@
+"""
+Test CalPal attendee directory
+"""
+
+import sqlite3
+
+from calpal.core import AttendeeDirectory, Contact, MeetingRequest
+
+
+def make_directory():
+    return AttendeeDirectory([
+        Contact(name="John Smith", email="john.smith@example.com", aliases=["JS"]),
+        Contact(name="Johanna Berg", email="johanna@example.com", calendar_id="johanna-cal"),
+        Contact(name="Sarah Lee", email="sarah@example.com"),
+    ])
+
+
+def test_resolve_exact_prefix_and_fuzzy():
+    directory = make_directory()
+    assert directory.resolve("John").email == "john.smith@example.com"
+    assert directory.resolve("js").email == "john.smith@example.com"
+    assert directory.resolve("Sar").email == "sarah@example.com"
+    assert directory.resolve("Sarha").email == "sarah@example.com"
+    assert directory.resolve("new@example.com").email == "new@example.com"
+
+
+def test_ambiguous_and_unknown_names_are_unresolved():
+    directory = make_directory()
+    assert directory.resolve("Joh") is None  # John or Johanna
+    assert directory.resolve("Bob") is None
+
+
+def test_cache_is_bounded_to_most_recent_names():
+    directory = AttendeeDirectory([Contact(name="Sarah Lee", email="sarah@example.com")], cache_size=2)
+    for name in ["Sarah", "Sar", "Sarah", "Sarha"]:
+        assert directory.resolve(name).email == "sarah@example.com"
+    
+    assert list(directory._cache) == ["sarah", "sarha"]
+
+
+def test_resolve_request_replaces_names_with_emails():
+    meeting = MeetingRequest(attendees=["John", "Johanna", "Bob"], topic="Sync",
+                             duration_minutes=30, time_constraint="tomorrow")
+    resolution = make_directory().resolve_request(meeting)
+    
+    assert resolution.meeting.attendees == ["john.smith@example.com", "johanna@example.com"]
+    assert [contact.calendar for contact in resolution.contacts] == [
+        "john.smith@example.com", "johanna-cal"]
+    assert resolution.unresolved == ["Bob"]
+
+
+def test_load_from_csv_and_sqlite(tmp_path):
+    csv_path = tmp_path / "contacts.csv"
+    csv_path.write_text("name,email,calendar_id,aliases\n"
+                        "Mike Chen,mike@example.com,,Mikey;MC\n")
+    assert AttendeeDirectory.from_file(str(csv_path)).resolve("mikey").email == "mike@example.com"
+    
+    db_path = tmp_path / "contacts.db"
+    connection = sqlite3.connect(db_path)
+    connection.execute("CREATE TABLE contacts (name TEXT, email TEXT)")
+    connection.execute("INSERT INTO contacts VALUES ('Mike Chen', 'mike@example.com')")
+    connection.commit()
+    connection.close()
+    assert AttendeeDirectory.from_file(str(db_path)).resolve("Chen").email == "mike@example.com"
@@ -0,0 +1,38 @@
+"""
+Test CalPal single-pass extractor and helper utilities
+"""
+
+from calpal.utils.extractor import extract, extract_many, is_email
+from calpal.utils.helpers import extract_emails, extract_names, parse_duration
+
+
+def test_extract_all_fields_in_one_pass():
+    result = extract("Team sync with John and sarah@example.com next Thursday at 3:30pm for 2 hours")
+    assert result.emails == ["sarah@example.com"]
+    assert result.names == ["John"]
+    assert result.durations == [120]
+    assert result.dates == ["next thursday"]
+    assert result.times == [(15, 30)]
+
+
+def test_extract_dates_and_times():
+    result = extract("Call Bob on May 5th at noon, or tomorrow at 14:00 or 12am")
+    assert result.dates == ["may 5th", "tomorrow"]
+    assert result.times == [(12, 0), (14, 0), (0, 0)]
+    assert result.names == ["Bob"]
+
+
+def test_extract_many_matches_extract():
+    texts = ["Lunch with John next Thursday at 1pm", "Coffee with Sarah and Mike next week"]
+    assert extract_many(texts) == [extract(text) for text in texts]
+
+
+def test_helpers_share_the_extractor():
+    text = "Project review with Priya on Friday for 90 minutes"
+    assert extract_names(text) == ["Priya"]
+    assert extract_emails("Contact john@example.com or jane@example.com") == [
+        "john@example.com", "jane@example.com"]
+    assert parse_duration(text) == 90
+    assert parse_duration("2 hours") == 120
+    assert parse_duration("sometime soon") == 60
+    assert is_email("john@example.com") and not is_email("John")
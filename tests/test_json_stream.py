@@ -0,0 +1,91 @@
+"""
+Test CalPal incremental JSON parsing and streamed LLM parses
+"""
+
+import json
+
+from calpal.core import ParserAgent
+from calpal.utils.json_stream import IncrementalJSONParser
+
+
+RESPONSE = {
+    'attendees': ['john@example.com', 'Sarah, from sales'],
+    'topic': 'Lunch {planning}',
+    'duration_minutes': 45,
+    'time_constraint': 'next Thursday at 1pm',
+}
+
+
+def chunks(text, size=5):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_fields_complete_as_chunks_arrive():
+    text = "```json\n" + json.dumps(RESPONSE, indent=2) + "\n```\nLet me know!"
+    parser = IncrementalJSONParser()
+    
+    order = []
+    for chunk in chunks(text):
+        order.extend(parser.feed(chunk))
+    
+    assert order == list(RESPONSE)
+    assert parser.done
+    assert parser.fields == RESPONSE
+    assert json.loads(parser.object_text) == RESPONSE
+
+
+def test_field_is_reported_before_object_closes():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"time_constraint": "tomor') == {}
+    assert parser.feed('row", "topic": "Sy') == {'time_constraint': 'tomorrow'}
+    assert not parser.done
+
+
+def test_parse_stream_stops_reading_when_object_closes(monkeypatch):
+    text = json.dumps(RESPONSE) + " and then a long explanation"
+    consumed = []
+    
+    def stream(natural_language):
+        for chunk in chunks(text):
+            consumed.append(chunk)
+            yield chunk
+    
+    parser = ParserAgent('test-key')
+    monkeypatch.setattr(parser, '_stream', stream)
+    fields = []
+    
+    meeting = parser.parse_stream("Lunch with John", on_field=lambda name, value: fields.append(name))
+    
+    assert meeting.duration_minutes == 45
+    assert fields == list(RESPONSE)
+    assert ''.join(consumed).startswith(json.dumps(RESPONSE))
+    assert len(''.join(consumed)) < len(text)
+
+
+def test_parse_stream_escalates_through_tiers_on_truncated_response(monkeypatch):
+    events = []
+    parser = ParserAgent('test-key', models=['fast-model', 'large-model'],
+                         on_event=lambda name, data: events.append((name, data.get('model'))))
+    monkeypatch.setattr(parser, '_stream', lambda natural_language: iter(['{"topic": "Sy']))
+    monkeypatch.setattr(parser, '_complete', lambda text, tier: (
+        json.dumps(RESPONSE) if tier.model == 'large-model' else 'Sorry, no JSON today.'))
+    
+    meeting = parser.parse_stream("Lunch with John")
+    
+    assert meeting.duration_minutes == RESPONSE['duration_minutes']
+    # The streamed call is the fast tier's only attempt
+    assert events == [('parse.escalated', 'fast-model')]
+    fast, large = parser.tier_stats()
+    assert (fast['calls'], fast['valid']) == (1, 0)
+    assert (large['calls'], large['valid']) == (1, 1)
+
+
+def test_parse_stream_falls_back_when_every_tier_fails(monkeypatch):
+    parser = ParserAgent('test-key')
+    monkeypatch.setattr(parser, '_stream', lambda natural_language: iter(['{"topic": "Sy']))
+    monkeypatch.setattr(parser, '_complete', lambda text, tier: 'Sorry, no JSON today.')
+    
+    meeting = parser.parse_stream("Lunch with john@example.com for 30 minutes")
+    
+    assert meeting.attendees == ['john@example.com']
+    assert meeting.duration_minutes == 30
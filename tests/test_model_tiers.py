@@ -0,0 +1,99 @@
+"""
+Test CalPal tiered model escalation and hedged requests
+"""
+
+import json
+import threading
+import time
+
+from calpal.core import ParserAgent
+
+
+VALID = json.dumps({'attendees': ['john@example.com'], 'topic': 'Sync',
+                    'duration_minutes': 30, 'time_constraint': 'tomorrow'})
+
+
+def test_invalid_response_escalates_to_next_tier(monkeypatch):
+    events = []
+    parser = ParserAgent('test-key', models=['fast-model', 'large-model'],
+                         on_event=lambda name, data: events.append(name))
+    responses = {'fast-model': 'Sure! The meeting is tomorrow.', 'large-model': VALID}
+    monkeypatch.setattr(parser, '_complete', lambda text, tier: responses[tier.model])
+    
+    meeting = parser.parse("Sync with john@example.com tomorrow")
+    
+    assert meeting.topic == 'Sync'
+    assert events == ['parse.escalated']
+    fast, large = parser.tier_stats()
+    assert (fast['calls'], fast['valid'], fast['accuracy']) == (1, 0, 0.0)
+    assert (large['calls'], large['valid'], large['accuracy']) == (1, 1, 1.0)
+
+
+def test_slow_call_is_hedged_after_p95(monkeypatch):
+    parser = ParserAgent('test-key')
+    tier = parser.tiers[0]
+    for _ in range(tier.min_samples):
+        tier.record(20, valid=True)
+    
+    calls = []
+    lock = threading.Lock()
+    
+    def complete(text, tier):
+        with lock:
+            calls.append(time.perf_counter())
+            first = len(calls) == 1
+        # The first request stalls; the hedged one answers quickly
+        time.sleep(1.0 if first else 0.01)
+        return VALID
+    
+    monkeypatch.setattr(parser, '_complete', complete)
+    started = time.perf_counter()
+    meeting = parser.parse("Sync with john@example.com tomorrow")
+    
+    assert meeting.topic == 'Sync'
+    assert time.perf_counter() - started < 0.5
+    assert len(calls) == 2
+    stats = parser.tier_stats()[0]
+    assert (stats['hedged'], stats['hedge_wins']) == (1, 1)
+    assert stats['p95_ms'] == 20
+
+
+def test_slow_call_not_hedged_without_a_free_slot(monkeypatch):
+    parser = ParserAgent('test-key', concurrency=1)
+    tier = parser.tiers[0]
+    for _ in range(tier.min_samples):
+        tier.record(20, valid=True)
+    
+    calls = []
+    
+    def complete(text, tier):
+        calls.append(text)
+        time.sleep(0.2)
+        return VALID
+    
+    monkeypatch.setattr(parser, '_complete', complete)
+    meeting = parser.parse("Sync with john@example.com tomorrow")
+    
+    assert meeting.topic == 'Sync'
+    assert len(calls) == 1
+    assert parser.tier_stats()[0]['hedged'] == 0
+    parser.close()
+
+
+def test_waiting_for_a_slot_does_not_trigger_a_hedge(monkeypatch):
+    parser = ParserAgent('test-key', concurrency=2)
+    tier = parser.tiers[0]
+    for _ in range(tier.min_samples):
+        tier.record(50, valid=True)
+    monkeypatch.setattr(parser, '_complete', lambda text, tier: time.sleep(0.01) or VALID)
+    
+    # Other requests hold every slot for longer than the p95
+    parser._slots.acquire()
+    parser._slots.acquire()
+    releases = threading.Timer(0.2, lambda: (parser._slots.release(), parser._slots.release()))
+    releases.start()
+    meeting = parser.parse("Sync with john@example.com tomorrow")
+    
+    assert meeting.topic == 'Sync'
+    assert parser.tier_stats()[0]['hedged'] == 0
+    parser.close()
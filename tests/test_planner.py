@@ -0,0 +1,105 @@
+"""
+Test CalPal dry-run planning and plan application
+"""
+
+from datetime import datetime, timedelta
+
+from calpal.core import (
+    PlannerAgent, MeetingRequest, TimeSlot, SlotSearch, SchedulePlan, EventResult, BusyPeriod
+)
+
+
+DAY_START = datetime(2030, 1, 7, 9, 0)
+
+
+class FakeParserAgent:
+    def parse(self, natural_language):
+        return MeetingRequest(attendees=["john@example.com"], topic=natural_language,
+                              duration_minutes=30, time_constraint="tomorrow")
+
+
+class FakeCalendarAgent:
+    """Calendar stand-in with half-hour slots starting at 9am"""
+    
+    def __init__(self, busy=None):
+        self.calendar_id = 'primary'
+        self.busy = list(busy or [])
+        self.attendee_busy = {}
+        self.created = []
+    
+    def search_slots(self, duration_minutes, time_constraint, extra_busy=None, **kwargs):
+        busy = self.busy + [(period.start_time, period.end_time) for period in extra_busy or []]
+        slots = []
+        for i in range(8):
+            start = DAY_START + timedelta(minutes=30 * i)
+            end = start + timedelta(minutes=duration_minutes)
+            if not any(start < busy_end and end > busy_start for busy_start, busy_end in busy):
+                slots.append(TimeSlot(start_time=start, end_time=end, duration_minutes=duration_minutes))
+        return SlotSearch(window_start=DAY_START, window_end=DAY_START + timedelta(hours=4),
+                          busy=[BusyPeriod(start_time=start, end_time=end) for start, end in sorted(busy)],
+                          slots=slots[:3])
+    
+    def get_busy_times(self, start_time, end_time, **kwargs):
+        return list(self.busy)
+    
+    def get_busy_times_by_calendar(self, calendar_ids, start_time, end_time, max_age=None):
+        return {calendar_id: list(self.busy) if calendar_id == self.calendar_id
+                else self.attendee_busy.get(calendar_id, []) for calendar_id in calendar_ids}
+    
+    def create_events(self, events):
+        self.created.extend(events)
+        return [EventResult(event=event, link='https://calendar.example/event') for event in events]
+
+
+def test_plan_does_not_write_or_double_book():
+    calendar = FakeCalendarAgent()
+    planner = PlannerAgent(FakeParserAgent(), calendar)
+    
+    plan = planner.plan(["Sync", "Review"])
+    
+    assert calendar.created == []
+    assert plan.meetings[0].slot.start_time == DAY_START
+    assert plan.meetings[1].slot.start_time == DAY_START + timedelta(minutes=30)
+    assert set(plan.meetings[0].timings_ms) == {'parse', 'search'}
+
+
+def test_conflicts_are_busy_time_before_the_chosen_slot():
+    calendar = FakeCalendarAgent(busy=[
+        (DAY_START - timedelta(hours=1), DAY_START + timedelta(minutes=30)),
+        (DAY_START + timedelta(hours=2), DAY_START + timedelta(hours=3)),
+    ])
+    
+    planned = PlannerAgent(FakeParserAgent(), calendar).plan(["Sync"]).meetings[0]
+    
+    assert planned.slot.start_time == DAY_START + timedelta(minutes=30)
+    # Clipped to the window, and busy time after the slot is not a conflict
+    assert [(period.start_time, period.end_time) for period in planned.conflicts] == [
+        (DAY_START, DAY_START + timedelta(minutes=30))
+    ]
+
+
+def test_plan_round_trips_and_applies_with_fallback():
+    calendar = FakeCalendarAgent()
+    planner = PlannerAgent(FakeParserAgent(), calendar)
+    plan = SchedulePlan.model_validate_json(planner.plan(["Sync"]).model_dump_json())
+    
+    # The planned slot is taken after planning
+    calendar.busy.append((DAY_START, DAY_START + timedelta(minutes=30)))
+    results = PlannerAgent(None, calendar).apply(plan)
+    
+    assert results[0].success
+    assert results[0].slot.start_time == DAY_START + timedelta(minutes=30)
+    assert calendar.created[0].start_time == DAY_START + timedelta(minutes=30)
+
+
+def test_apply_rechecks_attendee_calendars():
+    calendar = FakeCalendarAgent()
+    plan = PlannerAgent(FakeParserAgent(), calendar).plan(["Sync"])
+    plan.meetings[0].attendee_calendar_ids = ['john@example.com']
+    
+    # The attendee was booked at the planned slot after planning
+    calendar.attendee_busy['john@example.com'] = [(DAY_START, DAY_START + timedelta(minutes=30))]
+    results = PlannerAgent(None, calendar).apply(plan)
+    
+    assert results[0].success
+    assert results[0].slot.start_time == DAY_START + timedelta(minutes=30)
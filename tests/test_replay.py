@@ -0,0 +1,114 @@
+"""
+Test CalPal record/replay of LLM and Calendar API traffic
+"""
+
+import json
+import time
+from datetime import datetime, timedelta
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from calpal.core import CalendarAgent, CalendarEvent, ParserAgent, Recorder, Replayer
+from calpal.core.replay import InteractionSession
+from calpal.exceptions.calpal_exceptions import ReplayError
+
+
+START = datetime(2030, 1, 7, 9, 0)
+BUSY = [(START, START + timedelta(hours=1))]
+
+
+class FakeRequest:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+    
+    def execute(self):
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+class FakeService:
+    """Calendar API stand-in with one busy period on every calendar"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def freebusy(self):
+        return self
+    
+    def events(self):
+        return self
+    
+    def query(self, body):
+        self.calls += 1
+        return FakeRequest({'calendars': {item['id']: {'busy': [
+            {'start': start.isoformat() + 'Z', 'end': end.isoformat() + 'Z'} for start, end in BUSY
+        ]} for item in body['items']}})
+    
+    def insert(self, calendarId, body):
+        self.calls += 1
+        return FakeRequest(error=HttpError(httplib2.Response({'status': 409}), b'conflict'))
+
+
+class FakeCredentialManager:
+    def get_credentials(self):
+        return None
+
+
+def agent_event():
+    return CalendarEvent(summary="Sync", start_time=START, end_time=START + timedelta(hours=1),
+                         attendees=[])
+
+
+def live_agent(monkeypatch, session):
+    monkeypatch.setattr(CalendarAgent, '_authenticate', lambda self: None)
+    agent = CalendarAgent('credentials.json', 'token.json', session=session)
+    agent.credential_manager = FakeCredentialManager()
+    agent.service = session.wrap_service(FakeService())
+    return agent
+
+
+def test_calendar_traffic_replays_offline(monkeypatch, tmp_path):
+    path = str(tmp_path / 'session.jsonl.gz')
+    with Recorder(path) as recorder:
+        agent = live_agent(monkeypatch, recorder)
+        recorded_busy = agent.get_busy_times(START, START + timedelta(days=1), max_age=0)
+        recorded_result = agent.create_event(agent_event())
+    
+    monkeypatch.undo()
+    replayed = CalendarAgent('missing.json', 'missing-token.json', session=Replayer(path))
+    assert replayed.credential_manager is None
+    # Replays match by operation when the query differs, e.g. a later timeMin
+    assert replayed.get_busy_times(START, START + timedelta(days=2)) == recorded_busy == BUSY
+    result = replayed.create_event(agent_event())
+    assert not result.success and result.error == recorded_result.error
+    
+    with pytest.raises(ReplayError):
+        replayed.get_busy_times(START, START + timedelta(days=3), max_age=0)
+
+
+def test_llm_replay_injects_recorded_latency(tmp_path):
+    path = tmp_path / 'session.jsonl'
+    response = {'attendees': ['john@example.com'], 'topic': 'Lunch', 'duration_minutes': 45,
+                'time_constraint': 'next Thursday at 1pm'}
+    path.write_text(json.dumps({'op': 'llm:gemini-pro', 'key': 'Lunch with John',
+                                'ms': 100, 'response': json.dumps(response)}) + '\n')
+    
+    parser = ParserAgent('replay', session=Replayer(str(path), latency_scale=0.5))
+    started = time.perf_counter()
+    meeting = parser.parse('Lunch with John')
+    
+    assert time.perf_counter() - started >= 0.05
+    assert meeting.duration_minutes == 45
+    assert meeting.attendees == ['john@example.com']
+
+
+def test_session_without_call_cannot_be_created():
+    class Incomplete(InteractionSession):
+        pass
+    
+    with pytest.raises(TypeError):
+        Incomplete()
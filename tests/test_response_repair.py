@@ -0,0 +1,72 @@
+"""
+Test CalPal repair of malformed LLM parser responses
+"""
+
+import pytest
+
+from calpal.core import ParserAgent, AttendeeDirectory, Contact
+from calpal.core.response_repair import ResponseRepairer
+
+
+def test_valid_response_needs_no_repair():
+    repairer = ResponseRepairer()
+    meeting = repairer.repair('{"attendees": ["john@example.com"], "topic": "Sync", '
+                              '"duration_minutes": 30, "time_constraint": "tomorrow"}')
+    assert meeting.duration_minutes == 30
+    assert repairer.metrics() == {'responses': 1, 'valid': 1, 'repaired': 0, 'failed': 0, 'repairs': {}}
+
+
+def test_fenced_response_with_trailing_text_and_text_duration():
+    repairer = ResponseRepairer()
+    meeting = repairer.repair('Here is the JSON:\n```json\n{"attendees": ["John Smith <john@example.com>"], '
+                              '"topic": "Sync", "duration_minutes": "1 hour 30 minutes", '
+                              '"time_constraint": "tomorrow"}\n```\nLet me know if you need more.')
+    
+    assert meeting.attendees == ['john@example.com']
+    assert meeting.duration_minutes == 90
+    assert repairer.metrics()['repairs'] == {'code_fence': 1, 'duration': 1, 'attendees': 1}
+
+
+def test_python_style_response_is_rewritten_as_json():
+    repairer = ResponseRepairer()
+    meeting = repairer.repair("{'attendees': 'john@example.com and Sarah', 'topic': 'Sarah's \"big\" review', "
+                              "'duration_minutes': '1.5 hrs', 'time_constraint': 'next week', "
+                              "'location': None,} Thanks!")
+    
+    assert meeting.attendees == ['john@example.com', 'Sarah']
+    assert meeting.topic == 'Sarah\'s "big" review'
+    assert meeting.duration_minutes == 90
+    assert meeting.location is None
+    assert set(repairer.metrics()['repairs']) == {'surrounding_text', 'json_syntax', 'duration', 'attendees'}
+
+
+def test_names_resolve_to_emails_and_failures_are_counted():
+    directory = AttendeeDirectory([Contact(name='Sarah Connor', email='sarah@example.com')])
+    repairer = ResponseRepairer(directory)
+    meeting = repairer.repair_fields({'attendees': [{'name': 'Sarah'}], 'topic': 'Sync',
+                                      'duration': 45, 'time_constraint': 'tomorrow'})
+    assert meeting.attendees == ['sarah@example.com']
+    assert meeting.duration_minutes == 45
+    
+    with pytest.raises(ValueError):
+        repairer.repair("I could not understand the request.")
+    assert repairer.metrics()['failed'] == 1
+
+
+def test_repairable_response_does_not_escalate(monkeypatch):
+    events = []
+    parser = ParserAgent('test-key', models=['fast-model', 'large-model'],
+                         on_event=lambda name, data: events.append(name))
+    calls = []
+    
+    def complete(text, tier):
+        calls.append(tier.model)
+        return ("```json\n{'attendees': ['john@example.com'], 'topic': 'Sync', "
+                "'duration_minutes': '30 mins', 'time_constraint': 'tomorrow'}\n```")
+    
+    monkeypatch.setattr(parser, '_complete', complete)
+    
+    assert parser.parse("Sync with john@example.com tomorrow").duration_minutes == 30
+    assert calls == ['fast-model']
+    assert events == []
+    assert parser.repairer.metrics()['repaired'] == 1
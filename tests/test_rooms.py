@@ -0,0 +1,150 @@
+"""
+Test CalPal room search and the shared interval engine
+"""
+
+from datetime import datetime, timedelta
+
+from calpal.core import RoomAgent, Room, MeetingRequest, BookingAgent, SlotReservations
+from calpal.core import CalendarEvent, EventResult
+from calpal.core import intervals
+from calpal.core.calendar_agent import BusyTimes
+
+
+WINDOW_START = datetime(2030, 1, 7, 9, 0)
+WINDOW_END = datetime(2030, 1, 7, 12, 0)
+
+
+class FakeCalendarAgent:
+    """In-memory stand-in for CalendarAgent keyed by calendar ID"""
+    
+    def __init__(self, busy_by_calendar=None, step_minutes=30, work_hours=(9, 12), max_days_ahead=1):
+        self.calendar_id = 'primary'
+        self.token_file = 'token.json'
+        self.busy_by_calendar = busy_by_calendar or {}
+        self.step_minutes = step_minutes
+        self.work_hours = work_hours
+        self.max_days_ahead = max_days_ahead
+        self.errors = {}
+        self.queries = []
+        self.windows = []
+        self.created = []
+    
+    def get_search_window(self, time_constraint, days_ahead=7):
+        return WINDOW_START, WINDOW_END
+    
+    def get_busy_times_by_calendar(self, calendar_ids, start_time, end_time):
+        self.queries.append(list(calendar_ids))
+        self.windows.append((start_time, end_time))
+        return BusyTimes(
+            ((calendar_id, [(busy_start, busy_end)
+                            for busy_start, busy_end in self.busy_by_calendar.get(calendar_id, [])
+                            if busy_start < end_time and busy_end > start_time])
+             for calendar_id in calendar_ids if calendar_id not in self.errors),
+            {calendar_id: self.errors[calendar_id] for calendar_id in calendar_ids
+             if calendar_id in self.errors})
+    
+    def is_slot_free(self, start_time, end_time, attendee_calendar_ids=None):
+        calendar_ids = [self.calendar_id] + list(attendee_calendar_ids or [])
+        busy = intervals.merge(period for calendar_id in calendar_ids
+                               for period in self.busy_by_calendar.get(calendar_id, []))
+        return not intervals.overlaps(busy, start_time, end_time)
+    
+    def create_event(self, event):
+        self.created.append(event)
+        return EventResult(event=event, link='https://calendar.example/event')
+
+
+def at(hour, minute=0):
+    return WINDOW_START.replace(hour=hour, minute=minute)
+
+
+def make_request(attendees=('a@example.com',), location=None):
+    return MeetingRequest(topic="Sync", attendees=list(attendees), duration_minutes=60,
+                          time_constraint="tomorrow", location=location)
+
+
+ROOMS = [
+    Room(name="Boardroom", calendar_id='board@resource', capacity=12, attributes=['video']),
+    Room(name="Huddle", calendar_id='huddle@resource', capacity=2),
+    Room(name="Focus", calendar_id='focus@resource', capacity=4, attributes=['Video']),
+]
+
+
+def test_free_slots_jumps_over_busy_intervals():
+    merged = intervals.merge([(at(10), at(10, 45)), (at(9, 30), at(10, 15))])
+    assert merged == [(at(9, 30), at(10, 45))]
+    
+    slots = intervals.free_slots(merged, at(9), at(12), timedelta(minutes=30), timedelta(minutes=30))
+    assert [start for start, _ in slots] == [at(9), at(11), at(11, 30)]
+    assert intervals.overlaps(merged, at(10, 30), at(11))
+    assert not intervals.overlaps(merged, at(10, 45), at(11))
+
+
+def test_candidate_rooms_filter_by_capacity_and_attributes():
+    agent = RoomAgent(FakeCalendarAgent(), ROOMS)
+    assert [room.name for room in agent.candidate_rooms(3)] == ["Focus", "Boardroom"]
+    assert [room.name for room in agent.candidate_rooms(2, ['video'])] == ["Focus", "Boardroom"]
+    assert [room.name for room in agent.candidate_rooms(20, location="huddle")] == ["Huddle"]
+
+
+def test_rooms_and_attendees_searched_in_one_query():
+    calendar = FakeCalendarAgent({
+        'primary': [(at(9), at(10))],
+        'huddle@resource': [(at(10), at(11))],
+        'focus@resource': [(at(9), at(12))],
+    })
+    agent = RoomAgent(calendar, ROOMS)
+    
+    slots = agent.find_available_slots(make_request(), attendee_calendar_ids=['a@example.com'])
+    
+    assert len(calendar.queries) == 1
+    assert set(calendar.queries[0]) == {'primary', 'a@example.com', 'board@resource',
+                                        'huddle@resource', 'focus@resource'}
+    # The smallest free room wins each start time
+    assert [(slot.start_time, slot.room.name) for slot in slots] == [
+        (at(10), "Boardroom"), (at(10, 30), "Boardroom"), (at(11), "Huddle")
+    ]
+
+
+def test_room_search_follows_step_working_hours_and_horizon():
+    # Everyone is busy for the rest of the first day
+    calendar = FakeCalendarAgent({'primary': [(at(9), at(17))]}, step_minutes=15,
+                                 work_hours=(9, 17), max_days_ahead=28)
+    agent = RoomAgent(calendar, ROOMS[:1])
+    
+    slots = agent.find_available_slots(make_request(), max_slots=3)
+    
+    next_day = WINDOW_START + timedelta(days=1)
+    assert [slot.start_time for slot in slots] == [
+        next_day, next_day + timedelta(minutes=15), next_day + timedelta(minutes=30)
+    ]
+    # The horizon widened once, fetching only the new day
+    assert calendar.windows == [(WINDOW_START, next_day), (next_day, next_day + timedelta(days=1))]
+
+
+def test_unreadable_room_is_dropped_not_offered():
+    calendar = FakeCalendarAgent()
+    calendar.errors = {'huddle@resource': 'notFound'}
+    events = []
+    agent = RoomAgent(calendar, ROOMS, on_event=lambda name, data: events.append((name, data['rooms'])))
+    
+    slots = agent.find_available_slots(make_request())
+    
+    assert slots and all(slot.room.name != "Huddle" for slot in slots)
+    assert events == [('rooms.unreadable', ["Huddle"])]
+
+
+def test_booking_holds_and_invites_room():
+    calendar = FakeCalendarAgent({'board@resource': [(at(9), at(10))]})
+    agent = RoomAgent(calendar, ROOMS[:1])
+    slots = agent.find_available_slots(make_request())
+    booking = BookingAgent(calendar, reservations=SlotReservations())
+    
+    event = CalendarEvent(summary="Sync", start_time=at(9), end_time=at(10),
+                          attendees=['a@example.com'])
+    result = booking.book(event, slots)
+    
+    assert result.event.start_time == at(10)
+    assert result.event.location == "Boardroom"
+    assert result.event.attendees == ['a@example.com', 'board@resource']
+    assert not booking.reservations.reserve('board@resource', at(10), at(11))
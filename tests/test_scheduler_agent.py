@@ -0,0 +1,152 @@
+"""
+Test CalPal scheduler results and events
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from calpal.core import (
+    SchedulerAgent, MeetingRequest, TimeSlot, EventResult, ScheduleOutcome, Room, RoomAgent
+)
+
+
+class FakeParserAgent:
+    def __init__(self, fail=False):
+        self.fail = fail
+    
+    def parse(self, natural_language):
+        if self.fail:
+            raise ValueError("unparseable")
+        return MeetingRequest(attendees=["john@example.com"], topic="Sync",
+                              duration_minutes=30, time_constraint="tomorrow")
+
+
+class FakeCalendarAgent:
+    def __init__(self, slots):
+        self.calendar_id = 'scheduler-test'
+        self.slots = slots
+    
+    def find_available_slots(self, duration_minutes, time_constraint, **kwargs):
+        return self.slots
+    
+    def is_slot_free(self, start_time, end_time, attendee_calendar_ids=None):
+        return True
+    
+    def create_event(self, event):
+        return EventResult(event=event, link='https://calendar.example/event')
+
+
+def make_slot():
+    start = datetime(2030, 1, 7, 9, 0)
+    return TimeSlot(start_time=start, end_time=start + timedelta(minutes=30), duration_minutes=30)
+
+
+def test_schedule_returns_result_and_reports_events():
+    events = []
+    scheduler = SchedulerAgent(FakeParserAgent(), FakeCalendarAgent([make_slot()]),
+                               on_event=lambda name, data: events.append(name))
+    
+    result = scheduler.schedule_meeting("Sync with john@example.com tomorrow")
+    
+    assert result.outcome == ScheduleOutcome.SCHEDULED
+    assert result.event_link == 'https://calendar.example/event'
+    assert set(result.timings_ms) == {'parse', 'search', 'book'}
+    assert events[0] == 'request.received' and events[-1] == 'event.created'
+
+
+def test_schedule_reports_stage_failures():
+    result = SchedulerAgent(FakeParserAgent(fail=True), FakeCalendarAgent([])).schedule_meeting("?")
+    assert result.outcome == ScheduleOutcome.PARSE_FAILED
+    assert result.errors[0].stage == 'parse'
+    
+    result = SchedulerAgent(FakeParserAgent(), FakeCalendarAgent([])).schedule_meeting("Sync")
+    assert result.outcome == ScheduleOutcome.NO_SLOTS
+    
+    scheduler = SchedulerAgent(FakeParserAgent(), FakeCalendarAgent([make_slot()]),
+                               confirm=lambda slot: False)
+    assert scheduler.schedule_meeting("Sync").outcome == ScheduleOutcome.CANCELLED
+
+
+class FakeStreamingParser(FakeParserAgent):
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+    
+    def parse_stream(self, natural_language, on_field=None):
+        meeting = self.parse(natural_language)
+        for name, value in meeting.model_dump().items():
+            self.log.append(f'field:{name}')
+            on_field(name, value)
+        return meeting
+
+
+class PrefetchingCalendarAgent(FakeCalendarAgent):
+    def __init__(self, slots, log):
+        super().__init__(slots)
+        # Holds on the shared reservations outlive each test, so use a separate calendar
+        self.calendar_id = 'prefetch-test'
+        self.log = log
+    
+    def get_search_window(self, time_constraint, days_ahead=7):
+        return datetime(2030, 1, 7), datetime(2030, 1, 14)
+    
+    def get_busy_times(self, start_time, end_time, attendee_calendar_ids=None):
+        self.log.append('prefetch')
+        self.prefetched = (start_time, end_time, attendee_calendar_ids)
+        self.prefetch_threads = getattr(self, 'prefetch_threads', []) + [threading.get_ident()]
+        return []
+    
+    def find_available_slots(self, duration_minutes, time_constraint, **kwargs):
+        self.log.append('search')
+        return self.slots
+
+
+def test_streamed_parse_prefetches_before_search():
+    log = []
+    scheduler = SchedulerAgent(FakeStreamingParser(log), PrefetchingCalendarAgent([make_slot()], log),
+                               stream_parse=True)
+    
+    result = scheduler.schedule_meeting("Sync with john@example.com tomorrow")
+    
+    assert result.outcome == ScheduleOutcome.SCHEDULED
+    assert log.count('prefetch') == 1
+    assert log.index('field:time_constraint') < log.index('prefetch') < log.index('search')
+
+
+def test_prefetches_reuse_threads_across_requests():
+    calendar = PrefetchingCalendarAgent([make_slot()], [])
+    scheduler = SchedulerAgent(FakeStreamingParser([]), calendar, stream_parse=True,
+                               confirm=lambda slot: False)
+    
+    for _ in range(3):
+        scheduler.schedule_meeting("Sync with john@example.com tomorrow")
+    
+    # Each thread keeps its Calendar service, so reused threads skip client setup
+    assert len(calendar.prefetch_threads) == 3
+    assert len(set(calendar.prefetch_threads)) == 1
+
+
+def test_closed_scheduler_searches_without_prefetching():
+    log = []
+    calendar = PrefetchingCalendarAgent([make_slot()], log)
+    calendar.calendar_id = 'closed-prefetch-test'
+    scheduler = SchedulerAgent(FakeStreamingParser(log), calendar, stream_parse=True)
+    assert SchedulerAgent(FakeParserAgent(), FakeCalendarAgent([]))._prefetcher is None
+    
+    scheduler.close()
+    result = scheduler.schedule_meeting("Sync with john@example.com tomorrow")
+    
+    assert result.outcome == ScheduleOutcome.SCHEDULED
+    assert 'prefetch' not in log
+
+
+def test_prefetch_covers_first_day_and_fitting_rooms():
+    calendar = PrefetchingCalendarAgent([], [])
+    rooms = RoomAgent(calendar, [Room(name="Huddle", calendar_id='huddle@resource', capacity=2),
+                                 Room(name="Boardroom", calendar_id='board@resource', capacity=12)])
+    scheduler = SchedulerAgent(FakeParserAgent(), calendar, room_agent=rooms)
+    
+    scheduler._prefetch_busy_times({'attendees': ['a@example.com', 'b@example.com'],
+                                    'time_constraint': 'next week'})
+    
+    assert calendar.prefetched == (datetime(2030, 1, 7), datetime(2030, 1, 8), ['board@resource'])
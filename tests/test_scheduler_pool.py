@@ -0,0 +1,84 @@
+"""
+Test CalPal scheduler pool
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from calpal.core import SchedulerPool, MeetingRequest, TimeSlot, EventResult
+
+
+class FakeParserAgent:
+    """Parser stand-in that honours its concurrency limit and records its peak concurrency"""
+    
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.slots = None
+    
+    def limit_concurrency(self, limit):
+        self.slots = threading.BoundedSemaphore(limit)
+    
+    def parse(self, natural_language):
+        with self.slots:
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.01)
+            with self.lock:
+                self.active -= 1
+        return MeetingRequest(attendees=[], topic=natural_language,
+                              duration_minutes=30, time_constraint="tomorrow")
+
+
+class FakeCalendarAgent:
+    """Calendar stand-in with a single day of free half-hour slots"""
+    
+    def __init__(self, calendar_id):
+        self.calendar_id = calendar_id
+        self.busy = []
+        self.lock = threading.Lock()
+    
+    def find_available_slots(self, duration_minutes, time_constraint, **kwargs):
+        start = datetime(2030, 1, 7, 9, 0)
+        return [
+            TimeSlot(start_time=start + timedelta(minutes=30 * i),
+                     end_time=start + timedelta(minutes=30 * i + 30),
+                     duration_minutes=30)
+            for i in range(5)
+        ]
+    
+    def is_slot_free(self, start_time, end_time, attendee_calendar_ids=None):
+        with self.lock:
+            return not any(start_time < end and end_time > start for start, end in self.busy)
+    
+    def create_event(self, event):
+        with self.lock:
+            self.busy.append((event.start_time, event.end_time))
+        return EventResult(event=event, link='https://calendar.example/event')
+
+
+def test_pool_schedules_all_requests():
+    parser = FakeParserAgent()
+    calendar = FakeCalendarAgent('pool-map')
+    
+    with SchedulerPool(parser, calendar, workers=4, llm_concurrency=2) as pool:
+        results = pool.map([f"Meeting {i}" for i in range(5)])
+    
+    assert all(result.success for result in results)
+    assert len(set(calendar.busy)) == 5
+    assert parser.peak <= 2
+
+
+def test_pool_rejects_after_shutdown():
+    pool = SchedulerPool(FakeParserAgent(), FakeCalendarAgent('pool-shutdown'), workers=1)
+    future = pool.submit("Meeting")
+    pool.shutdown()
+    
+    assert future.result().success
+    with pytest.raises(RuntimeError):
+        pool.submit("Another meeting")
@@ -0,0 +1,110 @@
+"""
+Test CalPal slot search granularity and adaptive horizon
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from calpal.core import CalendarAgent
+from calpal.exceptions.calpal_exceptions import ConfigurationError
+
+
+START = datetime(2030, 1, 7, 9, 0)
+
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+    
+    def execute(self):
+        return self.response
+
+
+class FakeService:
+    """Freebusy stand-in that records each queried window"""
+    
+    def __init__(self, busy):
+        self.busy = busy
+        self.windows = []
+    
+    def freebusy(self):
+        return self
+    
+    def query(self, body):
+        time_min = datetime.fromisoformat(body['timeMin'].rstrip('Z'))
+        time_max = datetime.fromisoformat(body['timeMax'].rstrip('Z'))
+        self.windows.append((time_min, time_max))
+        busy = [{'start': start.isoformat() + 'Z', 'end': end.isoformat() + 'Z'}
+                for start, end in self.busy if start < time_max and end > time_min]
+        return FakeRequest({'calendars': {item['id']: {'busy': busy} for item in body['items']}})
+
+
+class FakeCredentialManager:
+    def get_credentials(self):
+        return None
+
+
+def make_agent(monkeypatch, busy, **kwargs):
+    monkeypatch.setattr(CalendarAgent, '_authenticate', lambda self: None)
+    kwargs.setdefault('freebusy_ttl', 0)
+    agent = CalendarAgent('credentials.json', 'token.json', **kwargs)
+    agent.credential_manager = FakeCredentialManager()
+    agent.service = FakeService(busy)
+    monkeypatch.setattr(agent, '_parse_time_constraint', lambda constraint, days: (START, START))
+    return agent
+
+
+def test_horizon_widens_geometrically_without_refetching(monkeypatch):
+    # The first three days are fully booked
+    agent = make_agent(monkeypatch, [(START, START + timedelta(days=2, hours=8))])
+    
+    search = agent.search_slots(60, "tomorrow", max_slots=3)
+    
+    assert [slot.start_time for slot in search.slots] == [
+        START + timedelta(days=3), START + timedelta(days=3, minutes=30), START + timedelta(days=3, hours=1)
+    ]
+    assert agent.service.windows == [
+        (START, START + timedelta(days=1)),
+        (START + timedelta(days=1), START + timedelta(days=2)),
+        (START + timedelta(days=2), START + timedelta(days=4)),
+    ]
+    assert search.window_end == START + timedelta(days=4)
+
+
+def test_repeated_widened_search_is_served_from_cache(monkeypatch):
+    # Fully booked for a week, so the horizon widens several times
+    agent = make_agent(monkeypatch, [(START, START + timedelta(days=7))], freebusy_ttl=300)
+    
+    first = agent.search_slots(30, "tomorrow")
+    queries = len(agent.service.windows)
+    assert queries > 1
+    assert agent._busy_cache['primary'].window_start == START
+    assert agent._busy_cache['primary'].window_end == first.window_end
+    
+    second = agent.search_slots(30, "tomorrow")
+    assert len(agent.service.windows) == queries
+    assert second.slots == first.slots
+
+
+def test_easy_search_stays_within_one_day(monkeypatch):
+    agent = make_agent(monkeypatch, [])
+    
+    search = agent.search_slots(30, "tomorrow")
+    
+    assert len(search.slots) == 5
+    assert len(agent.service.windows) == 1
+
+
+def test_step_grid_is_aligned_to_working_hours(monkeypatch):
+    agent = make_agent(monkeypatch, [(START, START + timedelta(minutes=20))],
+                       step_minutes=15, work_hours=(9, 10))
+    
+    slots = agent.find_available_slots(30, "tomorrow", days_ahead=2)
+    
+    assert [slot.start_time.strftime('%a %H:%M') for slot in slots] == [
+        'Mon 09:30', 'Tue 09:00', 'Tue 09:15', 'Tue 09:30'
+    ]
+    
+    with pytest.raises(ConfigurationError):
+        make_agent(monkeypatch, [], step_minutes=25)
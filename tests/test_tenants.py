@@ -0,0 +1,178 @@
+"""
+Test the CalPal tenant registry
+"""
+
+import os
+import threading
+import time
+
+import httplib2
+import pytest
+from google.oauth2.credentials import Credentials
+
+from calpal.core import CalendarAgent, Tenant, TenantRegistry
+from calpal.core import tenants as tenants_module
+from calpal.core.credentials import CredentialManager
+from calpal.core.tenants import _TokenBucket
+from calpal.exceptions.calpal_exceptions import ConfigurationError
+
+
+class FakeCredentialManager:
+    def get_credentials(self):
+        return None
+
+
+class FakeClock:
+    """Monotonic clock that only advances when slept on"""
+    
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeHttp:
+    """Connection pool stand-in answering every request with an empty freebusy response"""
+    
+    def __init__(self):
+        self.requests = []
+    
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        self.requests.append(uri)
+        return httplib2.Response({'status': '200'}), b'{"calendars": {}}'
+
+
+@pytest.fixture
+def logins(monkeypatch):
+    """Token files authenticated so far, in order"""
+    logins = []
+    
+    def authenticate(self):
+        logins.append(self.token_file)
+        self.credential_manager = FakeCredentialManager()
+        self.credentials = Credentials(token='token-' + self.token_file)
+    
+    monkeypatch.setattr(CalendarAgent, '_authenticate', authenticate)
+    return logins
+
+
+def tenant(name, **kwargs):
+    return Tenant(tenant_id=name, credentials_file='credentials.json',
+                  token_file=f'{name}-token.json', **kwargs)
+
+
+def test_agent_reused_without_authenticating_again(logins):
+    registry = TenantRegistry([tenant('acme', calendar_id='ops@acme.com')], freebusy_ttl=60)
+    
+    agent = registry.get('acme')
+    assert registry.get('acme') is agent
+    assert agent.calendar_id == 'ops@acme.com'
+    assert agent.freebusy_ttl == 60
+    assert logins == ['acme-token.json']
+    assert registry.stats() == {'tenants': 1, 'active': 1, 'hits': 1, 'created': 1, 'evicted': 0}
+    
+    with pytest.raises(ConfigurationError):
+        registry.get('unknown')
+
+
+def test_least_recently_used_tenant_evicted(logins):
+    events = []
+    registry = TenantRegistry([tenant('a'), tenant('b'), tenant('c')], max_active=2,
+                              on_event=lambda name, data: events.append((name, data['tenant_id'])))
+    CredentialManager.for_token_file('credentials.json', 'b-token.json', CalendarAgent.SCOPES)
+    
+    registry.get('a')
+    registry.get('b')
+    registry.get('a')
+    registry.get('c')
+    
+    assert ('tenant.evicted', 'b') in events
+    assert registry.stats()['active'] == 2
+    assert CredentialManager._instances.get(os.path.abspath('b-token.json')) is None
+    
+    # An evicted tenant is rebuilt on its next request
+    registry.get('b')
+    assert logins == ['a-token.json', 'b-token.json', 'c-token.json', 'b-token.json']
+
+
+def test_credentials_kept_while_another_tenant_uses_the_token_file(logins):
+    registry = TenantRegistry([tenant('a'), Tenant(tenant_id='alias', credentials_file='credentials.json',
+                                                   token_file=os.path.join('.', 'a-token.json'))])
+    manager = CredentialManager.for_token_file('credentials.json', 'a-token.json', CalendarAgent.SCOPES)
+    registry.get('a')
+    registry.get('alias')
+    
+    registry.unregister('alias')
+    assert CredentialManager._instances.get(os.path.abspath('a-token.json')) is manager
+    
+    registry.unregister('a')
+    assert CredentialManager._instances.get(os.path.abspath('a-token.json')) is None
+
+
+def test_concurrent_first_requests_build_one_agent(monkeypatch):
+    logins = []
+    
+    def slow_authenticate(self):
+        logins.append(self.token_file)
+        time.sleep(0.05)
+    
+    monkeypatch.setattr(CalendarAgent, '_authenticate', slow_authenticate)
+    registry = TenantRegistry([tenant('acme')], share_http=False)
+    agents = []
+    threads = [threading.Thread(target=lambda: agents.append(registry.get('acme'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert logins == ['acme-token.json']
+    assert all(agent is agents[0] for agent in agents)
+
+
+def test_rate_limit_applies_per_tenant_to_api_requests(logins, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(tenants_module, '_TokenBucket',
+                        lambda rate, burst: _TokenBucket(rate, burst, clock=clock, sleep=clock.sleep))
+    registry = TenantRegistry([tenant('slow', requests_per_second=4), tenant('fast')], burst=1)
+    http = registry._transport._local.http = FakeHttp()
+    slow, fast = registry.get('slow'), registry.get('fast')
+    assert isinstance(slow, CalendarAgent)
+    
+    for _ in range(3):
+        slow.service.freebusy().query(body={'items': []}).execute()
+    fast.service.freebusy().query(body={'items': []}).execute()
+    
+    # Only the slow tenant's second and third requests wait for its bucket
+    assert clock.sleeps == [0.25, 0.25]
+    assert len(http.requests) == 4
+
+
+def test_token_bucket_allows_burst_then_waits():
+    clock = FakeClock()
+    bucket = _TokenBucket(rate=4, burst=2, clock=clock, sleep=clock.sleep)
+    
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0.25
+    clock.now += 1
+    assert bucket.acquire() == 0
+
+
+def test_tenants_share_connection_pool_per_thread(logins):
+    registry = TenantRegistry([tenant('a'), tenant('b')])
+    first, second = registry.get('a').service, registry.get('b').service
+    
+    assert first._http.http is second._http.http
+    assert first._http.credentials is not second._http.credentials
+    
+    other_thread = []
+    thread = threading.Thread(target=lambda: other_thread.append(registry.get('a').service))
+    thread.start()
+    thread.join()
+    assert other_thread[0]._http.http is not first._http.http
@@ -0,0 +1,109 @@
+"""
+Test CalPal freebusy caching and the availability warmer
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from calpal.core import CalendarAgent, AvailabilityWarmer
+
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+    
+    def execute(self):
+        return self.response
+
+
+class FakeService:
+    """Calendar API stand-in that answers freebusy queries and counts them"""
+    
+    def __init__(self, busy_by_calendar=None, errors=None):
+        self.busy_by_calendar = busy_by_calendar or {}
+        self.errors = errors or {}
+        self.queries = []
+    
+    def freebusy(self):
+        return self
+    
+    def query(self, body):
+        self.queries.append(body)
+        return FakeRequest({'calendars': {
+            item['id']: ({'errors': [{'domain': 'global', 'reason': self.errors[item['id']]}], 'busy': []}
+                         if item['id'] in self.errors else
+                         {'busy': [{'start': start.isoformat() + 'Z', 'end': end.isoformat() + 'Z'}
+                                   for start, end in self.busy_by_calendar.get(item['id'], [])]})
+            for item in body['items']
+        }})
+
+
+class FakeCredentialManager:
+    def get_credentials(self):
+        return None
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    monkeypatch.setattr(CalendarAgent, '_authenticate', lambda self: None)
+    agent = CalendarAgent('credentials.json', 'token.json')
+    agent.credential_manager = FakeCredentialManager()
+    agent.service = FakeService()
+    return agent
+
+
+def window(days_from_now, days=1):
+    start = datetime.now().replace(microsecond=0) + timedelta(days=days_from_now)
+    return start, start + timedelta(days=days)
+
+
+def test_busy_times_served_from_cache_until_rechecked(calendar):
+    start, end = window(1)
+    calendar.service.busy_by_calendar = {'primary': [(start, start + timedelta(hours=1))]}
+    
+    assert calendar.get_busy_times(start, end) == [(start, start + timedelta(hours=1))]
+    assert calendar.get_busy_times(start + timedelta(hours=2), end) == []
+    assert len(calendar.service.queries) == 1
+    
+    # Re-checks before writing always go to the API
+    assert not calendar.is_slot_free(start, start + timedelta(minutes=30))
+    assert len(calendar.service.queries) == 2
+
+
+def test_unreadable_calendars_are_reported_and_not_cached(calendar):
+    start, end = window(1)
+    calendar.service.errors = {'room@resource': 'notFound'}
+    
+    busy = calendar.get_busy_times_by_calendar(['primary', 'room@resource'], start, end)
+    
+    assert dict(busy) == {'primary': []}
+    assert busy.errors == {'room@resource': 'notFound'}
+    assert 'room@resource' not in calendar._busy_cache
+
+
+def test_warmer_prefetches_most_requested_calendars(calendar):
+    start, end = window(1)
+    calendar.get_busy_times(start, end, ['a@example.com', 'b@example.com'])
+    calendar.get_busy_times(start, end, ['a@example.com'])
+    calendar.service.queries.clear()
+    
+    warmer = AvailabilityWarmer(calendar, top_n=2)
+    assert warmer.warm_once() == 2
+    assert [item['id'] for item in calendar.service.queries[0]['items']] == ['primary', 'a@example.com']
+    
+    # A later request in the warmed window needs no round trip
+    calendar.get_busy_times(*window(1, days=0.5), ['a@example.com'])
+    assert len(calendar.service.queries) == 1
+
+
+def test_warmer_stays_within_quota_budget(calendar):
+    calendar.get_busy_times(*window(1))
+    events = []
+    warmer = AvailabilityWarmer(calendar, max_queries_per_hour=2,
+                                on_event=lambda name, data: events.append(name))
+    
+    assert warmer.warm_once() == 1
+    assert warmer.warm_once() == 1
+    assert warmer.warm_once() == 0
+    assert events == ['warmer.refreshed', 'warmer.refreshed', 'warmer.skipped']